@@ -1,22 +1,37 @@
 import os
 import sys
-import tkinter as tk
-from tkinter import filedialog, simpledialog, messagebox
+import time
+
+STARTED = time.perf_counter()  # Time-to-first-frame is measured from here, before the heavy imports
+
 import pygame
-import win32api
-import win32con
-import win32gui
 import cv2
 import numpy as np
-from collections import Counter
 import threading
-from PIL import Image
-import pystray  # Added missing import for system tray
-from pystray import MenuItem as item
-import vlc  # For audio playback
+# tkinter, PIL, pystray and vlc are imported on first use, after the first frame is on screen
+from decode_worker import DecodeWorker
+from chroma_key import KEY_METRICS, create_keyer, warm_numba
+from frame_pool import FramePool, StripedKeyer
+from chroma_detect import ChromaDetector, detect_key_color
+from frame_scheduler import PresentationClock
+from frame_profiler import FrameProfiler
+from dirty_tiles import TileTracker
+from playlist_prefetch import PlaylistPrefetcher
+from loop_cache import LoopCache
+from frame_render import decode_size, render_frame
+from disk_cache import DiskFrameCache
+from clip_profiles import ClipProfiles
+from audio_engine import AudioEngine
+from window_backend import LayeredWindow
+from keyed_frame import FEATHER_STEPS, KeyedFrame
+
+CHROMA_DETECTED = pygame.USEREVENT + 1  # Posted by the background chroma detector
+RUN_ON_MAIN = pygame.USEREVENT + 2  # Carries a callable from the tray thread to the main loop
+
 
 class DesktopVideoOverlay:
-    def __init__(self):
+    def __init__(self, video_paths=None, window=None):
+        self.window = window or LayeredWindow()  # Window backend; HeadlessWindow runs without a display
         pygame.init()
         self.width = 400
         self.height = 600
@@ -24,105 +39,280 @@ class DesktopVideoOverlay:
         self.transparency_color = self.default_transparency_color
         self.default_color_tolerance = 30
         self.color_tolerance = self.default_color_tolerance
-        self.screen = pygame.display.set_mode(
-            (self.width, self.height),
-            pygame.NOFRAME | pygame.RESIZABLE
-        )
-        pygame.display.set_caption("Desktop Video Overlay")
+        self.chroma_backend = "auto"  # numpy, opencv, numba, lut or auto
+        self.numba_warm = False  # Until numba has loaded in the background, "auto" keys with OpenCV
+        self.default_key_metric = "rgb"
+        self.key_metric = self.default_key_metric  # rgb, ycbcr or hsv; cycled with M
+        # Threads for striped conversion and keying; DVO_WORKERS overrides the CPU-based default
+        self.frame_pool = FramePool(int(os.environ.get("DVO_WORKERS", 0)) or None)
+        self.keyer = self.create_frame_keyer()
+        self.screen = self.window.open((self.width, self.height))
         self.scale_factor = 1.0
         self.scale_step = 0.1
         self.is_dragging = False
         self.drag_offset = (0, 0)
         self.color_picking_mode = False
-        self.video = None
+        self.video = None  # DecodeWorker for the current clip
+        self.decode_queue_size = 4
+        self.profiler = FrameProfiler()  # Per-stage frame timings
+        self.show_hud = False  # Toggled with H
+        self.hud_surfaces = []
+        self.hud_updated = 0.0
+        self.profile_dump_path = os.environ.get("DVO_PROFILE")  # .json or .csv written on exit
+        self.clock = PresentationClock()  # Paces frames by timestamp, slaved to the audio clock
         self.video_path = None
         self.video_paths = []  # List of video file paths
         self.current_video_index = 0
         self.is_playing = False
-        self.temp_surface = None
-        self.scaled_surface = None
+        self.frame_buffer = None  # Scaled, keyed RGB frame at window size
+        self.frame_surface = None  # Surface sharing frame_buffer's memory
         self.last_frame_surface = None  # Store last frame for pause
+        self.incremental_rendering = False  # Toggled with I: re-key and update only changed tiles
+        self.tile_tracker = TileTracker()
+        self.scaled_buffer = None  # Unkeyed scaled frame, only needed for incremental rendering
+        # scale_then_key: when shrinking, the decoder downscales (INTER_AREA) so conversion
+        # and keying run at window size.
+        # key_then_scale: key at source size, then nearest-neighbour scale; no blended key-colour fringes.
+        # Upscales key first under either policy (identical output, fewer pixels keyed).
+        self.scale_policy = "scale_then_key"
+        self.source_buffer = None  # Source-size keyed frame for key_then_scale
+        self.dirty_rects = None  # Rects for present() to update; None means a full flip
+        self.full_redraw = True  # Set when the whole window must be redrawn (expose, overlays closed)
+        self.overlays_drawn = False  # HUD or picker text drawn on the last frame
+        self.rendered_key = None  # (colour, tolerance) the frame buffer was keyed with
+        self.edge_feather = 0  # Cycled with F: feather radius in window pixels, 0 for hard key edges
+        self.keyed_frame = KeyedFrame()  # Alpha plane for feathering, used while edge_feather is set
+        self.loop_caching = True  # Serve repeat loops of short clips from keyed frames held in RAM
+        self.loop_cache = LoopCache(512 * 1024 * 1024)
+        self.cached_loop = None  # CachedLoop played instead of decoding, once the clip is fully cached
+        self.cached_index = None
+        self.disk_caching = True  # Keep keyed frames on disk across runs, memory-mapped for playback
+        self.disk_cache = DiskFrameCache(backend=self.chroma_backend)
+        self.mapped_clip = None  # MappedClip for the current clip and key, if the disk cache has one
+        self.mapped_lookup = None  # What mapped_clip was looked up for, so misses aren't repeated per frame
+        self.mapped_since = 0.0  # When mapped_lookup last changed
+        self.build_requested = False  # A disk cache build was queued for mapped_lookup
+        self.disk_cache_delay = 2.0  # Seconds a clip and key must stay unchanged before a build is queued
+        self.idle_rendering = True  # Block on events instead of redrawing while paused
+        self.idle_timeout_ms = 250  # Wake-up interval while idle, for changes made from the tray
         self.font = pygame.font.SysFont("Arial", 14)
-        self.vlc_instance = vlc.Instance('--no-video')  # Disable video output
-        self.vlc_player = None  # VLC media player for audio
-        self.sound_playing = False
+        # One VLC player for every clip, driven from its own thread; VLC starts after the first frame
+        self.audio = AudioEngine()
+        self.key_pressed_at = None  # Time of the key press being handled, for audio latency
         self.running = True
         self.auto_chroma_enabled = False  # Flag to track auto-detect chroma state
+        self.tolerance_generation = 0  # Bumped when the user sets a tolerance, so detection won't override it
+        self.chroma_detector = ChromaDetector()  # Samples frames across the clip with its own capture
+        self.clip_profiles = ClipProfiles()  # Detected key and loop length per clip, kept across runs
+        self.loop_length_known = False  # The current clip's profile holds its exact frame count
+        # Keeps the neighbouring playlist clips opened and pre-decoded for instant switching
+        self.prefetcher = PlaylistPrefetcher(
+            self.decode_queue_size, detect_chroma=self.detect_clip_chroma, pool=self.frame_pool
+        )
+        self.tk_root = None  # Hidden Tk root shared by every dialog, created by get_tk_root()
+        self.info_window = None  # Open Info window, pumped by the main loop
+        self.time_to_first_frame = None  # Seconds from start-up to the first frame on screen
+        self.load_started = None  # When the current clip started loading, until its first frame is shown
+        self.load_latency = None  # Seconds from the last load to its first frame on screen
+        # Start-up work that can wait until the first frame is on screen
+        self.deferred = [self.start_tray_icon, self.start_keyer_warmup]
+        self.started_up = False  # Deferred work has run
         self.make_window_transparent()
-        self.select_video()
-        # Start system tray thread
+        if video_paths:
+            self.video_paths = list(video_paths)
+            self.load_video()
+        else:
+            self.select_video()
+
+    def start_tray_icon(self):
         tray_thread = threading.Thread(target=self.setup_tray_icon, daemon=True)
         tray_thread.start()
 
+    def get_tk_root(self):
+        """The hidden Tk root every dialog is parented to, created on first use (main thread only)."""
+        if self.tk_root is None:
+            import tkinter as tk
+            self.tk_root = tk.Tk()
+            self.tk_root.withdraw()
+        return self.tk_root
+
+    def call_on_main(self, callback):
+        """Run callback on the main loop; tray actions that open dialogs go through here."""
+        try:
+            pygame.event.post(pygame.event.Event(RUN_ON_MAIN, callback=callback))
+        except pygame.error:
+            pass  # Display already shut down
+
+    def run_deferred(self):
+        """Run the start-up work held back until the first frame was shown."""
+        self.started_up = True
+        deferred, self.deferred = self.deferred, []
+        for task in deferred:
+            try:
+                task()
+            except Exception as e:
+                print(f"Error during deferred start-up: {e}")
+
+    def note_first_frame(self):
+        """Record time-to-first-frame for start-up and for the clip just loaded."""
+        now = time.perf_counter()
+        if self.time_to_first_frame is None:
+            self.time_to_first_frame = now - STARTED
+            print(f"Time to first frame: {self.time_to_first_frame * 1000:.0f} ms")
+        self.load_latency = now - self.load_started
+        self.load_started = None
+
+    def show_info_window(self, info):
+        """Show info in a non-modal window, so playback carries on while it is open."""
+        import tkinter as tk
+        self.close_info_window()
+        window = tk.Toplevel(self.get_tk_root())
+        window.title("Desktop Video Overlay Info")
+        window.attributes("-topmost", True)
+        tk.Label(window, text=info, justify=tk.LEFT, padx=12, pady=12).pack()
+        tk.Button(window, text="OK", width=10, command=self.close_info_window).pack(pady=(0, 12))
+        window.protocol("WM_DELETE_WINDOW", self.close_info_window)
+        self.info_window = window
+
+    def close_info_window(self):
+        if self.info_window is not None:
+            self.info_window.destroy()
+            self.info_window = None
+
+    def create_frame_keyer(self):
+        """Keyer for chroma_backend, striped across the frame pool when it has several workers."""
+        backend = self.chroma_backend
+        if backend == "auto" and not self.numba_warm:
+            backend = "opencv"  # Loading numba would delay the first frame by about a second
+        if self.frame_pool.workers > 1:
+            return StripedKeyer(backend, self.frame_pool, self.key_metric)
+        return create_keyer(backend, self.key_metric)
+
+    def start_keyer_warmup(self):
+        """Load the numba kernels on a background thread, then switch the "auto" keyer over to them."""
+        def warm_up():
+            try:
+                ready = warm_numba()
+            except Exception as e:
+                print(f"Error loading numba, keeping the OpenCV keyer: {e}")
+                return
+            if ready:
+                self.call_on_main(self.use_warm_keyer)
+
+        if self.chroma_backend == "auto":
+            threading.Thread(target=warm_up, daemon=True).start()
+
+    def use_warm_keyer(self):
+        self.numba_warm = True
+        self.keyer = self.create_frame_keyer()
+        self.tile_tracker.invalidate()
+
+    def set_worker_threads(self, workers):
+        """Resize the frame pool used for striped conversion and keying (None picks from the CPU count)."""
+        old_pool = self.frame_pool
+        self.frame_pool = FramePool(workers)
+        self.keyer = self.create_frame_keyer()
+        self.prefetcher.pool = self.frame_pool
+        if self.video:
+            self.video.pool = self.frame_pool
+        old_pool.release()  # Warm clips still holding it fall back to serial conversion
+        self.last_frame_surface = None
+        self.tile_tracker.invalidate()
+        print(f"Frame worker threads: {self.frame_pool.workers}")
+
+    def set_key_metric(self, metric):
+        """Switch how colour distance to the key is measured (see chroma_key.KEY_METRICS)."""
+        if metric not in KEY_METRICS:
+            raise ValueError(f"Unknown key metric: {metric}")
+        if metric == self.key_metric:
+            return
+        self.key_metric = metric
+        self.keyer = self.create_frame_keyer()
+        self.tile_tracker.invalidate()
+        print(f"Key metric: {metric} ({KEY_METRICS[metric]})")
+
+    def cycle_key_metric(self):
+        metrics = list(KEY_METRICS)
+        self.set_key_metric(metrics[(metrics.index(self.key_metric) + 1) % len(metrics)])
+
+    def set_edge_feather(self, radius):
+        """Feather keyed edges by radius window pixels, suppressing key-colour spill there; 0 turns it off."""
+        self.edge_feather = radius
+        self.keyed_frame.feather = radius
+        self.tile_tracker.invalidate()
+        print(f"Edge feathering: {f'{radius} px' if radius else 'off'}")
+
+    def cycle_edge_feather(self):
+        steps = list(FEATHER_STEPS)
+        index = steps.index(self.edge_feather) if self.edge_feather in steps else -1
+        self.set_edge_feather(steps[(index + 1) % len(steps)])
+
     def reset_chroma(self):
         """Reset chroma key to default values and disable auto-detection."""
         self.transparency_color = self.default_transparency_color
         self.color_tolerance = self.default_color_tolerance
+        self.set_key_metric(self.default_key_metric)
         self.auto_chroma_enabled = False  # Disable auto-detection
         self.make_window_transparent()
-        self.scaled_surface = None  # Force re-scale
         print(f"Chroma reset to default: {self.transparency_color}, tolerance: {self.color_tolerance}")
 
     def auto_detect_chroma(self):
-        """Automatically detect the most likely chroma key color."""
-        if not self.video or not self.temp_surface:
+        """Automatically detect the most likely chroma key color and a tolerance for it.
+
+        A quick estimate from the frame on screen is applied straight away; a
+        multi-frame estimate across the whole clip follows from the background
+        detector without taking frames from playback.
+        """
+        if not self.video:
             return
-        # Draw current frame to temp surface
-        ret, frame = self.video.read()
-        if not ret:
+        # Use the decoded frame currently on screen, or the next one right after a load
+        frame_rgb = self.video.current_frame
+        if frame_rgb is None:
+            frame_rgb = self.video.peek_frame(timeout=1.0)
+        if frame_rgb is not None:
+            self.transparency_color, self.color_tolerance = detect_key_color([frame_rgb])
+            self.make_window_transparent()
+            print(f"Auto-detected chroma color: {self.transparency_color}, tolerance: {self.color_tolerance}")
+        generation = self.tolerance_generation
+        self.chroma_detector.request(
+            self.video_path,
+            lambda video_path, result: self.post_detected_chroma(video_path, result, generation)
+        )
+
+    def detect_clip_chroma(self, video_path):
+        """(color, tolerance) for a clip from its stored profile, or detected and then stored."""
+        chroma = self.clip_profiles.chroma(video_path)
+        if chroma is None:
+            chroma = self.chroma_detector.detect(video_path)
+            if chroma is not None:
+                self.clip_profiles.update(video_path, key_color=chroma[0], tolerance=chroma[1])
+        return chroma
+
+    def post_detected_chroma(self, video_path, result, generation):
+        """Remember a background detection result and hand it to the UI thread."""
+        if result is not None:
+            self.clip_profiles.update(video_path, key_color=result[0], tolerance=result[1])
+        try:
+            pygame.event.post(pygame.event.Event(
+                CHROMA_DETECTED, video_path=video_path, result=result, generation=generation
+            ))
+        except pygame.error:
+            pass  # Display already shut down
+
+    def apply_detected_chroma(self, event):
+        """Apply a multi-frame detection result if it still matches the current clip."""
+        if not self.auto_chroma_enabled or event.video_path != self.video_path or event.result is None:
             return
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_surface = pygame.surfarray.make_surface(np.rot90(frame_rgb))
-        self.temp_surface.blit(frame_surface, (0, 0))
-        
-        # Convert surface to numpy array
-        surf_array = pygame.surfarray.pixels3d(self.temp_surface)
-        
-        # Sample pixels from the edges of the frame
-        edge_pixels = []
-        edge_pixels.extend(surf_array[10:-10, 0].tolist())  # Top edge
-        edge_pixels.extend(surf_array[10:-10, -1].tolist())  # Bottom edge
-        edge_pixels.extend(surf_array[0, 10:-10].tolist())  # Left edge
-        edge_pixels.extend(surf_array[-1, 10:-10].tolist())  # Right edge
-        
-        # Convert to tuples for counting
-        edge_pixels = [tuple(pixel) for pixel in edge_pixels]
-        
-        # Find the most common color
-        color_counts = Counter(edge_pixels)
-        most_common_color = color_counts.most_common(1)[0][0]
-        
-        # Set as new transparency color
-        self.transparency_color = most_common_color
+        color, tolerance = event.result
+        self.transparency_color = color
+        if event.generation == self.tolerance_generation:
+            self.color_tolerance = tolerance
         self.make_window_transparent()
-        self.scaled_surface = None  # Force re-scale
-        print(f"Auto-detected chroma color: {self.transparency_color}")
+        print(f"Refined chroma color: {self.transparency_color}, tolerance: {self.color_tolerance}")
 
     def make_window_transparent(self):
         """Set the window to be transparent and always on top."""
-        hwnd = pygame.display.get_wm_info()["window"]
-        win32gui.SetWindowLong(
-            hwnd,
-            win32con.GWL_EXSTYLE,
-            win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE) |
-            win32con.WS_EX_LAYERED | win32con.WS_EX_TOPMOST
-        )
-        win32gui.SetLayeredWindowAttributes(
-            hwnd,
-            win32api.RGB(*self.transparency_color),
-            0,
-            win32con.LWA_COLORKEY
-        )
-
-    def get_video_size(self, video_path):
-        """Get the dimensions of a video file."""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise Exception("Could not open video file")
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        cap.release()
-        return width, height
+        self.window.set_color_key(self.transparency_color)
 
     def select_transparency_color_from_screen(self):
         """Allow user to pick a transparency color from the video and disable auto-detection."""
@@ -130,23 +320,23 @@ class DesktopVideoOverlay:
         print("Color picking mode: Click on a color in the video to make it transparent")
         while self.color_picking_mode:
             self.draw_frame()
-            pygame.display.flip()
+            self.present()
+            self.wait_for_next_frame()
             for event in pygame.event.get():
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     x, y = event.pos
                     if 0 <= x < self.width and 0 <= y < self.height:
-                        ret, frame = self.video.read()
-                        if ret:
-                            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                            frame_surface = pygame.surfarray.make_surface(np.rot90(frame_rgb))
-                            self.temp_surface.blit(frame_surface, (0, 0))
-                            pixel_color = self.temp_surface.get_at((x, y))[:3]
+                        frame_rgb = self.video.current_frame
+                        if frame_rgb is not None:
+                            # Map the window position back onto the unkeyed source frame
+                            src_x = x * frame_rgb.shape[1] // self.width
+                            src_y = y * frame_rgb.shape[0] // self.height
+                            pixel_color = tuple(int(c) for c in frame_rgb[src_y, src_x])
                             self.transparency_color = pixel_color
                             self.auto_chroma_enabled = False  # Disable auto-detection
                             self.color_picking_mode = False
                             self.get_color_tolerance()
                             self.make_window_transparent()
-                            self.scaled_surface = None  # Force re-scale
                             print(f"New transparency color: {self.transparency_color}")
                             print(f"Color tolerance: {self.color_tolerance}")
                             return
@@ -154,32 +344,34 @@ class DesktopVideoOverlay:
                     self.color_picking_mode = False
                     print("Color picking canceled")
                     return
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+                    self.cycle_key_metric()
 
     def get_color_tolerance(self):
         """Prompt user for color tolerance value."""
-        root = tk.Tk()
-        root.withdraw()
+        from tkinter import simpledialog
         tolerance = simpledialog.askinteger(
             "Color Tolerance",
             "Enter color tolerance (0-255):",
             initialvalue=self.color_tolerance,
             minvalue=0,
-            maxvalue=255
+            maxvalue=255,
+            parent=self.get_tk_root()
         )
         if tolerance is not None:
             self.color_tolerance = tolerance
-        root.destroy()
+            self.tolerance_generation += 1
 
     def select_video(self):
         """Prompt user to select video files."""
-        root = tk.Tk()
-        root.withdraw()
+        from tkinter import filedialog
         self.video_paths = filedialog.askopenfilenames(
             title="Select Video File(s)",
             filetypes=[
                 ("Video files", "*.webm *.mp4 *.avi *.mov"),
                 ("All files", "*.*")
-            ]
+            ],
+            parent=self.get_tk_root()
         )
         if not self.video_paths:
             print("No video selected. Exiting.")
@@ -193,47 +385,75 @@ class DesktopVideoOverlay:
         if not self.video_paths:
             return
         self.video_path = self.video_paths[self.current_video_index]
+        self.load_started = time.perf_counter()
         try:
             if self.video:
                 self.video.release()
-            self.video = cv2.VideoCapture(self.video_path)
-            self.original_width, self.original_height = self.get_video_size(self.video_path)
-            self.update_window_size()  # Apply current scale factor
-            self.temp_surface = pygame.Surface((self.original_width, self.original_height))
-            self.scaled_surface = None  # Reset scaled surface
-            self.last_frame_surface = None  # Reset last frame
+            # A prefetched clip is already open, pre-decoded and analysed
+            clip = self.prefetcher.take(self.video_path)
+            if clip:
+                self.video = clip.worker
+                self.video.profiler = self.profiler  # Warm clips decode unprofiled until they play
+            else:
+                self.video = DecodeWorker(self.video_path, self.decode_queue_size, self.profiler,
+                                          self.frame_pool)
+            self.clock.reset()  # Restarts at the first decoded frame
+            self.cached_loop = None
+            self.cached_index = None
+            self.original_width, self.original_height = self.video.width, self.video.height
+            self.update_window_size()  # Apply current scale factor and allocate frame buffers
             self.is_playing = True
             print(f"Loaded video: {os.path.basename(self.video_path)}")
             print(f"Video dimensions: {self.width}x{self.height}")
+            print(f"Video frame rate: {self.video.fps:.2f} fps")
+            profile = self.clip_profiles.get(self.video_path)
+            if profile and profile.get("frame_count"):
+                self.video.frame_count_hint = profile["frame_count"]  # Exact, from an earlier play
+            self.loop_length_known = bool(profile and profile.get("frame_count"))
             self.load_sound()
-            # Reapply auto-detected chroma if enabled
+            # Reapply auto-detected chroma if enabled; a clip seen before skips detection
             if self.auto_chroma_enabled:
-                self.auto_detect_chroma()
+                chroma = clip.chroma if clip and clip.chroma is not None else self.clip_profiles.chroma(self.video_path)
+                if chroma is not None:
+                    self.transparency_color, self.color_tolerance = chroma
+                    self.make_window_transparent()
+                    print(f"Auto-detected chroma color: {self.transparency_color}, "
+                          f"tolerance: {self.color_tolerance}")
+                else:
+                    self.auto_detect_chroma()
+            self.prefetcher.prefetch(self.video_paths, self.current_video_index, self.auto_chroma_enabled)
+            if self.started_up:
+                self.audio.prepare(self.neighbour_paths())  # Parse the neighbours' media ahead of a switch
         except Exception as e:
             print(f"Error loading video: {e}")
             self.next_video()  # Try next video on error
 
-    def load_sound(self):
-        """Load and play the video's audio using VLC without video output."""
-        try:
-            if self.vlc_player:
-                self.vlc_player.stop()
-                self.vlc_player.release()
-            # Create a new VLC media player instance for audio only
-            self.vlc_player = self.vlc_instance.media_player_new()
-            media = self.vlc_instance.media_new(self.video_path)
-            self.vlc_player.set_media(media)
-            self.vlc_player.audio_set_volume(100)  # Set volume (0-100)
-            print(f"Loaded audio from video: {os.path.basename(self.video_path)}")
-            self.sound_playing = True
-            self.vlc_player.play()
-            if not self.is_playing:
-                self.vlc_player.pause()
-                self.sound_playing = False
-        except Exception as e:
-            print(f"Error loading video audio with VLC: {e}")
-            self.vlc_player = None
-            self.sound_playing = False
+    def load_sound(self, start_time=None):
+        """Switch the audio engine to the current video's audio; returns without waiting on VLC."""
+        if not self.started_up:
+            # Starting VLC waits until the first frame is on screen; the audio then joins at the clock time
+            if self.start_deferred_audio not in self.deferred:
+                self.deferred.append(self.start_deferred_audio)
+            return
+        self.audio.play(self.video_path, paused=not self.is_playing, start_time=start_time,
+                        requested_at=self.key_pressed_at)
+
+    def audio_start_time(self):
+        """Where in the clip audio should play from to match the video (None before the clock starts)."""
+        loop_duration = self.cached_loop.duration if self.cached_loop is not None else None
+        if self.video and not loop_duration:
+            loop_duration = self.video.loop_duration
+        return self.clock.clip_time(loop_duration)
+
+    def start_deferred_audio(self):
+        self.load_sound(self.audio_start_time())
+        self.audio.prepare(self.neighbour_paths())
+
+    def neighbour_paths(self):
+        """The clips either side of the current one in the playlist."""
+        count = len(self.video_paths)
+        paths = [self.video_paths[(self.current_video_index + step) % count] for step in (1, -1)]
+        return [path for i, path in enumerate(paths) if path != self.video_path and path not in paths[:i]]
 
     def next_video(self):
         """Switch to the next video in the list."""
@@ -256,14 +476,11 @@ class DesktopVideoOverlay:
         if self.video:
             self.video.release()
             self.video = None
-        if self.vlc_player:
-            self.vlc_player.stop()
-            self.vlc_player.release()
-            self.vlc_player = None
+        self.audio.stop()
         self.is_playing = False
-        self.sound_playing = False
-        self.scaled_surface = None
         self.last_frame_surface = None  # Reset last frame
+        self.cached_loop = None
+        self.cached_index = None
         if not preserve_settings:
             self.reset_chroma()
 
@@ -273,129 +490,438 @@ class DesktopVideoOverlay:
         new_height = int(self.original_height * self.scale_factor)
         self.width = max(50, new_width)
         self.height = max(50, new_height)
-        self.screen = pygame.display.set_mode(
-            (self.width, self.height),
-            pygame.NOFRAME | pygame.RESIZABLE
-        )
-        self.scaled_surface = None  # Force re-scale
+        if self.frame_buffer is not None and self.frame_buffer.shape[:2] == (self.height, self.width):
+            # Same size (e.g. next clip in a uniform playlist): keep the window and buffers
+            self.last_frame_surface = None  # Reset last frame
+            self.configure_decode_size()
+            return
+        self.screen = self.window.open((self.width, self.height))
+        # Allocate the output buffer once per size; every frame is scaled and keyed into it
+        self.frame_buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.frame_surface = pygame.image.frombuffer(self.frame_buffer, (self.width, self.height), "RGB")
         self.last_frame_surface = None  # Reset last frame
+        self.configure_decode_size()
         self.make_window_transparent()
 
+    def configure_decode_size(self):
+        """Have the decoder downscale right after decode when the window is smaller than the video."""
+        if not self.video:
+            return
+        self.video.set_output_size(decode_size(self.scale_policy, (self.width, self.height),
+                                               (self.original_width, self.original_height)))
+
+    def set_scale_policy(self, policy):
+        """Switch between "scale_then_key" and "key_then_scale"."""
+        if policy not in ("scale_then_key", "key_then_scale"):
+            raise ValueError(f"Unknown scale policy: {policy}")
+        self.scale_policy = policy
+        self.configure_decode_size()
+        self.last_frame_surface = None  # Re-key the frame on screen when paused
+        self.tile_tracker.invalidate()
+        print(f"Scale policy: {policy}")
+
     def handle_events(self):
         """Handle user input events."""
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
+            if not self.handle_event(event):
                 return False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    if self.color_picking_mode:
-                        self.color_picking_mode = False
-                        print("Color picking canceled")
-                    else:
-                        self.running = False
-                        return False
-                elif event.key == pygame.K_SPACE:
-                    self.is_playing = not self.is_playing
-                    if self.vlc_player:
-                        if self.is_playing:
-                            self.vlc_player.play()
-                            self.sound_playing = True
-                        else:
-                            self.vlc_player.pause()
-                            self.sound_playing = False
-                elif event.key == pygame.K_o:
-                    self.select_video()
-                elif event.key == pygame.K_p:
-                    self.select_transparency_color_from_screen()
-                elif event.key == pygame.K_c:
-                    self.reset_chroma()
-                elif event.key == pygame.K_a:
-                    self.auto_chroma_enabled = True  # Enable auto-detection
-                    self.auto_detect_chroma()
-                    self.get_color_tolerance()  # Prompt for tolerance only when enabling
-                elif event.key == pygame.K_r:
-                    self.scale_factor = 1.0
-                    self.update_window_size()
-                elif event.key == pygame.K_PLUS or event.key == pygame.K_KP_PLUS:
-                    self.scale_factor += self.scale_step
-                    self.update_window_size()
-                elif event.key == pygame.K_MINUS or event.key == pygame.K_KP_MINUS:
-                    self.scale_factor = max(0.1, self.scale_factor - self.scale_step)
-                    self.update_window_size()
-                elif event.key == pygame.K_RIGHT:
-                    self.next_video()
-                elif event.key == pygame.K_LEFT:
-                    self.previous_video()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    self.is_dragging = True
-                    self.drag_offset = event.pos
-            elif event.type == pygame.MOUSEBUTTONUP:
-                if event.button == 1:
-                    self.is_dragging = False
-            elif event.type == pygame.MOUSEMOTION:
-                if self.is_dragging:
-                    x, y = win32gui.GetCursorPos()
-                    win32gui.SetWindowPos(
-                        pygame.display.get_wm_info()["window"],
-                        win32con.HWND_TOPMOST,
-                        x - self.drag_offset[0],
-                        y - self.drag_offset[1],
-                        0, 0,
-                        win32con.SWP_NOSIZE
-                    )
+        return True
+
+    def handle_event(self, event):
+        """Handle a single event; returns False when the application should quit."""
+        self.key_pressed_at = time.perf_counter() if event.type == pygame.KEYDOWN else None
+        if event.type == pygame.QUIT:
+            self.running = False
+            return False
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.VIDEORESIZE,
+                            pygame.WINDOWSIZECHANGED):
+            self.full_redraw = True
+        elif event.type == CHROMA_DETECTED:
+            self.apply_detected_chroma(event)
+        elif event.type == RUN_ON_MAIN:
+            event.callback()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                if self.color_picking_mode:
+                    self.color_picking_mode = False
+                    print("Color picking canceled")
+                else:
+                    self.running = False
+                    return False
+            elif event.key == pygame.K_SPACE:
+                self.is_playing = not self.is_playing
+                if self.is_playing:
+                    self.clock.resume()
+                else:
+                    self.clock.pause()
+                if self.is_playing:
+                    self.audio.resume(self.key_pressed_at, self.audio_start_time())
+                else:
+                    self.audio.pause()
+            elif event.key == pygame.K_o:
+                self.select_video()
+            elif event.key == pygame.K_p:
+                self.select_transparency_color_from_screen()
+            elif event.key == pygame.K_c:
+                self.reset_chroma()
+            elif event.key == pygame.K_a:
+                self.auto_chroma_enabled = True  # Enable auto-detection
+                self.auto_detect_chroma()
+                self.get_color_tolerance()  # Prompt for tolerance only when enabling
+            elif event.key == pygame.K_r:
+                self.scale_factor = 1.0
+                self.update_window_size()
+            elif event.key == pygame.K_PLUS or event.key == pygame.K_KP_PLUS:
+                self.scale_factor += self.scale_step
+                self.update_window_size()
+            elif event.key == pygame.K_MINUS or event.key == pygame.K_KP_MINUS:
+                self.scale_factor = max(0.1, self.scale_factor - self.scale_step)
+                self.update_window_size()
+            elif event.key == pygame.K_RIGHT:
+                self.next_video()
+            elif event.key == pygame.K_LEFT:
+                self.previous_video()
+            elif event.key == pygame.K_i:
+                self.incremental_rendering = not self.incremental_rendering
+                self.tile_tracker.invalidate()  # frame_buffer and tile references are out of step
+                self.tile_tracker.reset_stats()
+                self.full_redraw = True
+                print(f"Incremental rendering: {'on' if self.incremental_rendering else 'off'}")
+            elif event.key == pygame.K_m:
+                self.cycle_key_metric()
+            elif event.key == pygame.K_f:
+                self.cycle_edge_feather()
+            elif event.key == pygame.K_h:
+                self.show_hud = not self.show_hud
+                self.hud_updated = 0.0  # Render fresh numbers straight away
+                self.full_redraw = True
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:
+                self.is_dragging = True
+                self.drag_offset = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 1:
+                self.is_dragging = False
+        elif event.type == pygame.MOUSEMOTION:
+            if self.is_dragging:
+                self.window.move_to_cursor(self.drag_offset)
         return True
 
     def draw_frame(self):
-        """Draw the current video frame with transparency, retaining last frame when paused."""
-        self.screen.fill(self.transparency_color)
+        """Draw the current video frame with transparency, retaining last frame when paused.
+
+        In incremental mode only the changed tiles are blitted and collected in
+        dirty_rects for present(); anything drawn over the frame (HUD, picker)
+        falls back to a full redraw.
+        """
+        if (self.video and not self.is_playing and self.video.current_frame is not None and
+                (self.last_frame_surface is None or self.rendered_key != self.key_state())):
+            # Paused: re-key the frame on screen after a key or window size change
+            if self.cached_loop is not None:
+                # The decoder is parked behind the loop cache; fetch the frame at the current time
+                self.resume_decoding()
+                if self.video.peek_frame(0.5) is not None:
+                    self.video.read()
+            self.process_frame(self.video.current_frame)
+            self.tile_tracker.invalidate()
+            self.last_frame_surface = self.frame_surface
+            self.full_redraw = True
+        overlays = self.show_hud or self.color_picking_mode
+        # Feathering looks past tile borders, so it always renders whole frames
+        tiles = self.incremental_rendering and not self.edge_feather
+        incremental = (tiles and self.last_frame_surface is not None and
+                       not self.full_redraw and not overlays and not self.overlays_drawn)
+        self.dirty_rects = [] if incremental else None
+        if not incremental:
+            self.screen.fill(self.transparency_color)
+            self.full_redraw = False
+        self.overlays_drawn = overlays
         if self.video:
-            if self.is_playing:
-                ret, frame = self.video.read()
-                if not ret:
-                    self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    ret, frame = self.video.read()
+            rects = []
+            if self.is_playing and self.cached_loop_ready():
+                if self.present_cached_frame():
+                    rects = [(0, 0, self.width, self.height)]
+                    self.last_frame_surface = self.frame_surface
+            elif self.is_playing:
+                # The decode worker loops the clip itself; no frame due means keep the last one
+                ret, frame_rgb = self.read_due_frame()
                 if ret:
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    frame_surface = pygame.surfarray.make_surface(np.rot90(frame_rgb))
-                    self.temp_surface.fill(self.transparency_color)
-                    self.temp_surface.blit(frame_surface, (0, 0))
-                    
-                    # Scale the surface if needed
-                    if (self.scaled_surface is None or 
-                        self.width != self.scaled_surface.get_width() or 
-                        self.height != self.scaled_surface.get_height()):
-                        self.scaled_surface = pygame.transform.scale(self.temp_surface, (self.width, self.height))
+                    if tiles:
+                        rects = self.process_frame_incremental(frame_rgb)
                     else:
-                        pygame.transform.scale(self.temp_surface, (self.width, self.height), self.scaled_surface)
-                    
-                    # Apply transparency
-                    transparent_surface = self.scaled_surface.copy()
-                    surf_array = pygame.surfarray.pixels3d(transparent_surface)
-                    tr = np.array(self.transparency_color)
-                    mask = np.sqrt(np.sum((surf_array - tr) ** 2, axis=2)) <= self.color_tolerance
-                    surf_array[mask] = self.transparency_color
-                    del surf_array  # Release lock
-                    
-                    self.last_frame_surface = transparent_surface  # Store last frame
-                    self.screen.blit(transparent_surface, (0, 0))
-            elif self.last_frame_surface:  # When paused, draw the last frame
-                self.screen.blit(self.last_frame_surface, (0, 0))
+                        self.process_frame(frame_rgb)
+                    self.cache_keyed_frame()
+                    self.remember_loop_length()
+                    self.last_frame_surface = self.frame_surface  # Store last frame
+            if self.last_frame_surface:  # Also covers pause: the buffer keeps the last frame
+                start = time.perf_counter()
+                if incremental:
+                    for rect in rects:
+                        self.screen.blit(self.last_frame_surface, rect, rect)
+                    self.dirty_rects = rects
+                else:
+                    self.screen.blit(self.last_frame_surface, (0, 0))
+                self.profiler.record("blit", start)
+            
+            if self.show_hud:
+                self.draw_hud()
             
             if self.color_picking_mode:
-                text = self.font.render("Click to select a color for transparency", True, (255, 255, 255))
+                text = self.font.render(f"Click to select a color for transparency (M: metric {self.key_metric})",
+                                        True, (255, 255, 255))
                 text_rect = text.get_rect(center=(self.width // 2, 20))
                 self.screen.blit(text, text_rect)
                 mouse_pos = pygame.mouse.get_pos()
                 pygame.draw.circle(self.screen, (255, 255, 255), mouse_pos, 5, 1)
 
+    def key_state(self):
+        """The chroma settings a keyed frame depends on."""
+        return tuple(self.transparency_color), self.color_tolerance, self.key_metric, self.edge_feather
+
+    def loop_key(self):
+        """Everything a cached keyed output frame depends on."""
+        return self.key_state(), self.width, self.height, self.scale_policy
+
+    def cached_loop_ready(self):
+        """Whether the clip can be played from the loop cache; restarts the decoder when it no longer can."""
+        loop = None
+        if self.loop_caching and self.clock.started:
+            loop = self.loop_cache.get(self.video_path, self.loop_key())
+            if loop is not None and not loop.complete:
+                loop = None
+        if loop is None and self.disk_caching and self.clock.started:
+            loop = self.open_mapped_clip()
+        if loop is None and self.cached_loop is not None:
+            self.resume_decoding()
+        self.cached_loop = loop
+        return loop is not None
+
+    def open_mapped_clip(self):
+        """The disk-cached frames for the current clip and key.
+
+        A miss queues a background build, but only for clips too big for the
+        loop cache, and only once the clip and key have stayed the same for
+        disk_cache_delay, so stepping through tolerances or sizes doesn't
+        start a build per step.
+        """
+        key = self.loop_key()
+        lookup = (self.video_path, key, self.disk_cache.builds)
+        now = time.perf_counter()
+        if lookup != self.mapped_lookup:
+            self.mapped_lookup = lookup
+            self.mapped_since = now
+            self.build_requested = False
+            self.mapped_clip = self.disk_cache.open(self.video_path, key)
+            if self.mapped_clip is not None:
+                print(f"Playing {os.path.basename(self.video_path)} from the frame cache")
+        if (self.mapped_clip is None and not self.build_requested and
+                now - self.mapped_since >= self.disk_cache_delay and not self.clip_fits_in_ram()):
+            self.build_requested = True
+            self.disk_cache.request(self.video_path, key, decode_size(
+                self.scale_policy, (self.width, self.height), (self.original_width, self.original_height)))
+        return self.mapped_clip
+
+    def clip_fits_in_ram(self):
+        """Whether the loop cache can hold the current clip at the current key, as far as is known yet."""
+        if not self.loop_caching:
+            return False
+        loop = self.loop_cache.get(self.video_path, self.loop_key())
+        if loop is not None and loop.over_budget:
+            return False
+        frame_count = self.video.frame_count_hint if self.video else None
+        return not (frame_count and frame_count * self.width * self.height * 3 > self.loop_cache.budget)
+
+    def present_cached_frame(self):
+        """Copy the due keyed frame from the loop or disk cache into the frame buffer.
+
+        Returns False if that frame is already shown.
+        """
+        start = time.perf_counter()
+        self.clock.sync_audio(self.audio.synced_player(), self.cached_loop.duration)
+        index, frame = self.cached_loop.frame_at(self.clock.time())
+        if index == self.cached_index and self.last_frame_surface is not None:
+            return False
+        self.cached_index = index
+        np.copyto(self.frame_buffer, frame)
+        self.rendered_key = self.key_state()
+        self.tile_tracker.invalidate()
+        self.loop_cache.hits += 1
+        self.profiler.record("upload", start)
+        return True
+
+    def resume_decoding(self):
+        """Leave the loop cache and restart the decoder at the current media time."""
+        duration = self.cached_loop.duration
+        self.cached_loop = None
+        self.cached_index = None
+        self.video.seek(self.clock.time(), duration)
+
+    def remember_loop_length(self):
+        """Store the clip's exact frame count and duration in its profile once the decoder has wrapped."""
+        if self.loop_length_known or not self.video.loop_frames:
+            return
+        self.loop_length_known = True
+        self.clip_profiles.update(self.video_path, frame_count=self.video.loop_frames,
+                                  duration=self.video.loop_duration)
+
+    def cache_keyed_frame(self):
+        """Copy the frame just keyed into the loop cache while the first loops play."""
+        if not self.loop_caching:
+            return
+        index, clip_time = self.video.current_position
+        loop = self.loop_cache.store(self.video_path, self.loop_key(), index, clip_time,
+                                     self.frame_buffer, self.video.frame_count_hint)
+        if self.video.loop_frames:
+            loop.set_length(self.video.loop_frames, self.video.loop_duration)
+
+    def is_idle(self):
+        """Paused with nothing on screen that animates: no drag and no colour picking."""
+        return not self.is_playing and not self.is_dragging and not self.color_picking_mode
+
+    def needs_redraw(self):
+        """Whether an idle window must be redrawn: expose/resize, new size or scale, or a chroma change."""
+        if self.full_redraw:
+            return True
+        if self.video is None or self.video.current_frame is None:
+            return False
+        return self.last_frame_surface is None or self.rendered_key != self.key_state()
+
+    def wait_idle(self):
+        """Block on the event queue, waking periodically for changes made from the tray thread."""
+        event = pygame.event.wait(20 if self.info_window else self.idle_timeout_ms)  # Keep Tk responsive
+        if event.type != pygame.NOEVENT:
+            self.handle_event(event)
+        self.handle_events()
+
+    def step(self):
+        """Run one iteration of the main loop."""
+        if self.deferred and (self.time_to_first_frame is not None or time.perf_counter() - STARTED > 2.0):
+            self.run_deferred()  # Also runs if the first frame is slow, so the tray always appears
+        if self.info_window is not None:
+            self.tk_root.update()
+        if self.idle_rendering and self.is_idle():
+            self.wait_idle()
+            if self.running and self.needs_redraw():
+                self.draw_frame()
+                self.present()
+            return
+        self.handle_events()
+        self.draw_frame()
+        self.present()
+        self.wait_for_next_frame()
+
+    def draw_hud(self):
+        """Draw the per-stage timing HUD, re-rendering the text twice a second."""
+        now = time.perf_counter()
+        if now - self.hud_updated > 0.5:
+            self.hud_updated = now
+            lines = self.profiler.hud_lines()
+            if self.incremental_rendering:
+                lines.append(f"tiles skipped {self.tile_tracker.skip_ratio:.0%}")
+            if self.video:
+                stats = self.video.stats()
+                lines.append(f"queue {stats['queue_depth']}  dropped {stats['frames_dropped']}  "
+                             f"stalls {stats['underruns']}")
+            self.hud_surfaces = [self.font.render(line, True, (255, 255, 255), (0, 0, 0)) for line in lines]
+        y = 4
+        for surface in self.hud_surfaces:
+            self.screen.blit(surface, (4, y))
+            y += surface.get_height()
+
+    def present(self):
+        """Flip the finished frame to the screen, or just its dirty rects in incremental mode."""
+        start = time.perf_counter()
+        self.window.present(self.dirty_rects)
+        self.profiler.record("flip", start)
+        if self.load_started is not None and self.last_frame_surface is not None:
+            self.note_first_frame()
+
+    def dump_profile(self):
+        """Write the frame profile if DVO_PROFILE names an output file."""
+        if not self.profile_dump_path:
+            return
+        extra = {"decoder": self.video.stats() if self.video else None, "clock": self.clock.stats(),
+                 "time_to_first_frame": self.time_to_first_frame, "load_latency": self.load_latency,
+                 "audio": self.audio.stats()}
+        if self.incremental_rendering:
+            extra["tiles_skipped"] = self.tile_tracker.skip_ratio
+        try:
+            self.profiler.dump(self.profile_dump_path, extra)
+        except OSError as e:
+            print(f"Error writing frame profile: {e}")
+
+    def read_due_frame(self):
+        """Take the newest decoded frame due at the current media time, skipping late ones."""
+        if not self.clock.started:
+            frame_time = self.video.next_frame_time()
+            if frame_time is None:
+                return False, None
+            self.clock.start(frame_time)
+        self.clock.sync_audio(self.audio.synced_player(), self.video.loop_duration)
+        ret, frame_rgb = self.video.read(until=self.clock.time())
+        if ret:
+            self.clock.record_presentation(self.video.current_time)
+        return ret, frame_rgb
+
+    def wait_for_next_frame(self):
+        """Sleep until the next frame is due instead of ticking at a fixed rate."""
+        delay = 1 / 60  # Keeps input responsive while paused, dragging or waiting on the decoder
+        if self.video and self.is_playing and not self.is_dragging and self.clock.started:
+            frame_time = self.video.next_frame_time()
+            if self.cached_loop is not None:
+                delay = min(self.cached_loop.time_until_next(self.clock.time()), 0.1)
+            elif frame_time is not None:
+                delay = min(self.clock.time_until(frame_time), 0.1)
+            else:
+                delay = self.video.frame_interval / 4  # Decoder is behind; check again soon
+        if delay > 0:
+            time.sleep(delay)
+
+    def process_frame(self, frame_rgb):
+        """Scale and key a decoded RGB frame into the persistent frame buffer without allocating."""
+        self.source_buffer = render_frame(frame_rgb, self.frame_buffer, self.keyer, self.transparency_color,
+                                          self.color_tolerance, self.scale_policy, self.source_buffer,
+                                          self.profiler, self.keyed_frame if self.edge_feather else None)
+        self.rendered_key = self.key_state()
+
+    def process_frame_incremental(self, frame_rgb):
+        """Re-key only the tiles that changed since they were last keyed and return their rects.
+
+        Tiles are tracked at window size, so this path always scales before keying.
+        """
+        start = time.perf_counter()
+        if frame_rgb.shape[:2] == self.frame_buffer.shape[:2]:
+            source = frame_rgb
+        else:
+            if self.scaled_buffer is None or self.scaled_buffer.shape != self.frame_buffer.shape:
+                self.scaled_buffer = np.empty_like(self.frame_buffer)
+            cv2.resize(frame_rgb, (self.width, self.height), dst=self.scaled_buffer,
+                       interpolation=cv2.INTER_NEAREST)
+            source = self.scaled_buffer
+            start = self.profiler.record("scale", start)
+        keyer = self.keyer
+        if keyer.set_key(self.transparency_color, self.color_tolerance):
+            self.tile_tracker.invalidate()
+        self.rendered_key = self.key_state()
+        rects = self.tile_tracker.update(source)
+        start = self.profiler.record("diff", start)
+        for x, y, w, h in rects:
+            region = self.frame_buffer[y:y + h, x:x + w]
+            np.copyto(region, source[y:y + h, x:x + w])
+            keyer.apply(region)
+        self.profiler.record("key", start)
+        return rects
+
     def is_similar_color(self, c1, c2, tolerance):
         """Check if two colors are similar within tolerance."""
         return all(abs(c1[i] - c2[i]) <= tolerance for i in range(3))
 
     def setup_tray_icon(self):
         """Set up the system tray icon with menu."""
+        from PIL import Image
+        import pystray
+        from pystray import MenuItem as item
+
         def show_info():
             if self.video_path:
                 info = f"Current Video: {os.path.basename(self.video_path)}\n" \
@@ -403,30 +929,79 @@ class DesktopVideoOverlay:
                        f"Scale Factor: {self.scale_factor:.2f}\n" \
                        f"Transparency Color: {self.transparency_color}\n" \
                        f"Color Tolerance: {self.color_tolerance}\n" \
-                       f"Auto-Chroma Enabled: {self.auto_chroma_enabled}"
-                messagebox.showinfo("Desktop Video Overlay Info", info)
+                       f"Auto-Chroma Enabled: {self.auto_chroma_enabled}\n" \
+                       f"Key Metric: {self.key_metric}\n" \
+                       f"Edge Feathering: {f'{self.edge_feather} px' if self.edge_feather else 'off'}\n" \
+                       f"Keyer: {self.keyer.name}"
+                if self.video:
+                    stats = self.video.stats()
+                    info += f"\nDecode Queue: {stats['queue_depth']}/{self.decode_queue_size}\n" \
+                            f"Frames Dropped: {stats['frames_dropped']}\n" \
+                            f"Decoder Stalls: {stats['underruns']} ({stats['stall_time']:.2f}s)\n" \
+                            f"Frame Rate: {self.video.fps:.2f} fps"
+                clock_stats = self.clock.stats()
+                if self.incremental_rendering:
+                    info += f"\nTiles Skipped: {self.tile_tracker.skip_ratio:.0%}"
+                info += f"\nA/V Drift: {clock_stats['drift'] * 1000:.0f} ms " \
+                        f"(max {clock_stats['max_drift'] * 1000:.0f} ms)\n" \
+                        f"Frame Lateness: {clock_stats['mean_lateness'] * 1000:.1f} ms " \
+                        f"(max {clock_stats['max_lateness'] * 1000:.1f} ms)"
+                prefetch_stats = self.prefetcher.stats()
+                info += f"\nPrefetched Clips: {prefetch_stats['warm']} " \
+                        f"({prefetch_stats['bytes'] / 2 ** 20:.0f} MB, " \
+                        f"{prefetch_stats['hits']} hits / {prefetch_stats['misses']} misses)"
+                loop_stats = self.loop_cache.stats()
+                info += f"\nLoop Cache: {loop_stats['complete']}/{loop_stats['clips']} clips " \
+                        f"({loop_stats['megabytes']:.0f} MB, {loop_stats['hits']} frames served)"
+                if self.mapped_clip is not None:
+                    info += "\nFrame Cache: playing from disk"
+                elif self.disk_cache.building:
+                    info += "\nFrame Cache: building"
+                if self.time_to_first_frame is not None:
+                    info += f"\nTime to First Frame: {self.time_to_first_frame * 1000:.0f} ms"
+                if self.load_latency is not None:
+                    info += f"\nLast Clip Load: {self.load_latency * 1000:.0f} ms"
+                audio_stats = self.audio.stats()
+                if audio_stats['last_latency'] is not None:
+                    info += f"\nAudio Start: {audio_stats['last_latency'] * 1000:.0f} ms " \
+                            f"(mean {audio_stats['mean_latency'] * 1000:.0f} ms, " \
+                            f"max {audio_stats['max_latency'] * 1000:.0f} ms)"
+                self.call_on_main(lambda: self.show_info_window(info))
 
         def set_tolerance():
-            self.get_color_tolerance()
+            self.call_on_main(self.get_color_tolerance)
 
+        # Anything that swaps the keyer or changes keying state runs between frames on the main loop
         def reset_chroma():
-            self.reset_chroma()
+            self.call_on_main(self.reset_chroma)
+
+        def set_key_metric(metric):
+            return lambda: self.call_on_main(lambda: self.set_key_metric(metric))
+
+        def set_edge_feather(radius):
+            return lambda: self.call_on_main(lambda: self.set_edge_feather(radius))
+
+        def set_worker_threads(workers):
+            return lambda: self.call_on_main(lambda: self.set_worker_threads(workers))
+
+        def toggle_key_before_scaling():
+            def toggle():
+                if self.scale_policy == "key_then_scale":
+                    self.set_scale_policy("scale_then_key")
+                else:
+                    self.set_scale_policy("key_then_scale")
+            self.call_on_main(toggle)
 
         def auto_detect_chroma():
-            self.auto_chroma_enabled = True  # Enable auto-detection
-            self.auto_detect_chroma()
-            self.get_color_tolerance()  # Prompt for tolerance only when enabling
+            def detect():
+                self.auto_chroma_enabled = True  # Enable auto-detection
+                self.auto_detect_chroma()
+                self.get_color_tolerance()  # Prompt for tolerance only when enabling
+            self.call_on_main(detect)  # Dialogs share the main thread's Tk root
 
         def quit_app():
-            self.running = False
-            if self.video:
-                self.video.release()
-            if self.vlc_player:
-                self.vlc_player.stop()
-                self.vlc_player.release()
-            pygame.quit()
+            self.running = False  # run() tears everything down once the main loop exits
             self.icon.stop()
-            sys.exit()
 
         menu = (
             item('Info', show_info),
@@ -434,6 +1009,23 @@ class DesktopVideoOverlay:
                 item('Set Tolerance', set_tolerance),
                 item('Reset Chroma', reset_chroma),
                 item('Auto-detect Chroma', auto_detect_chroma),
+                item('Key Metric', tuple(
+                    item(metric, set_key_metric(metric), radio=True,
+                         checked=lambda menu_item: self.key_metric == menu_item.text)
+                    for metric in KEY_METRICS
+                )),
+                item('Edge Feathering', tuple(
+                    item(f'{radius} px' if radius else 'Off', set_edge_feather(radius), radio=True,
+                         checked=lambda _, radius=radius: self.edge_feather == radius)
+                    for radius in FEATHER_STEPS
+                )),
+                item('Worker Threads', tuple(
+                    item(str(workers), set_worker_threads(workers), radio=True,
+                         checked=lambda _, workers=workers: self.frame_pool.workers == workers)
+                    for workers in (1, 2, 4, 8)
+                )),
+                item('Key Before Scaling', toggle_key_before_scaling,
+                     checked=lambda _: self.scale_policy == "key_then_scale"),
             )),
             item('Quit', quit_app)
         )
@@ -448,17 +1040,19 @@ class DesktopVideoOverlay:
 
     def run(self):
         """Run the main application loop."""
-        clock = pygame.time.Clock()
         while self.running:
-            self.handle_events()
-            self.draw_frame()
-            pygame.display.flip()
-            clock.tick(60)
+            self.step()
         if self.video:
             self.video.release()
-        if self.vlc_player:
-            self.vlc_player.stop()
-            self.vlc_player.release()
+        self.audio.release()
+        self.clip_profiles.save()
+        self.prefetcher.release()
+        self.chroma_detector.release()
+        self.frame_pool.release()
+        self.disk_cache.release()
+        self.dump_profile()
+        if self.tk_root is not None:
+            self.tk_root.destroy()
         pygame.quit()
         sys.exit()
 
@@ -477,9 +1071,13 @@ if __name__ == "__main__":
         print("  -: Scale video down")
         print("  Left Arrow: Previous video")
         print("  Right Arrow: Next video")
+        print("  M: Cycle key metric (rgb, ycbcr, hsv)")
+        print("  F: Cycle edge feathering (off, 2, 4, 8 px)")
+        print("  H: Toggle frame timing HUD")
+        print("  I: Toggle incremental (changed tiles only) rendering")
         print("  Click and drag: Move overlay around screen")
         
-        app = DesktopVideoOverlay()
+        app = DesktopVideoOverlay(sys.argv[1:])  # Clips on the command line skip the file dialog
         app.run()
     except Exception as e:
         print(f"Error: {e}")
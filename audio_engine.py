@@ -0,0 +1,187 @@
+"""Audio for the overlay: one long-lived VLC player driven from a worker thread.
+
+Switching clips swaps the media on the existing player instead of tearing
+down and rebuilding a player per clip, and media for the playlist
+neighbours is created and parsed ahead of time. Every VLC call except the
+clock's position reads happens on the worker, so the render loop never
+waits on VLC. The time from a request (e.g. a key press) to VLC reporting
+that audio is playing is recorded.
+"""
+import collections
+import os
+import queue
+import threading
+import time
+
+
+class AudioEngine:
+    """Audio-only playback of the current clip with prepared media for the next ones.
+
+    VLC itself is imported and started on the worker thread, on the first
+    command, so creating an engine costs nothing up front. Pass a shared
+    vlc.Instance to play several engines from one instance.
+    """
+
+    def __init__(self, instance=None, max_prepared=4, volume=100):
+        self.max_prepared = max_prepared
+        self.volume = volume
+        self.instance = instance
+        self.owns_instance = instance is None
+        self.player = None  # Read (is_playing, get_time) from other threads for clock sync
+        self.current_media = None
+        self.media = collections.OrderedDict()  # Path -> parsed vlc.Media, least recently used first
+        self.requested_path = None  # Clip the overlay last asked for
+        self.loaded_path = None  # Clip the player is set up with
+        self.paused = False
+        self.commands = queue.Queue()
+        self._playing = threading.Event()  # Set by VLC's MediaPlayerPlaying event
+        self._request_time = None  # When the request now waiting for playback was made
+        self.latencies = collections.deque(maxlen=50)  # Seconds from request to audio playing
+        self.switches = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def play(self, path, paused=False, start_time=None, requested_at=None):
+        """Switch to path; start_time (seconds) joins the clip part-way in, e.g. after a late start."""
+        self.requested_path = path
+        self.paused = paused
+        self.commands.put(("load", path, paused, start_time, requested_at or time.perf_counter()))
+
+    def pause(self):
+        self.paused = True
+        self.commands.put(("pause",))
+
+    def resume(self, requested_at=None, start_time=None):
+        """Continue playback; audio that already ended restarts at start_time (seconds into the clip)."""
+        self.paused = False
+        self.commands.put(("resume", requested_at or time.perf_counter(), start_time))
+
+    def stop(self):
+        self.requested_path = None
+        self.commands.put(("stop",))
+
+    def prepare(self, paths):
+        """Create and parse media for paths in the background, ready for a later play()."""
+        self.commands.put(("prepare", list(paths)))
+
+    def synced_player(self):
+        """The player, if it is playing the requested clip; the presentation clock follows it."""
+        if self.player is None or self.loaded_path is None or self.loaded_path != self.requested_path:
+            return None
+        return self.player
+
+    def stats(self):
+        """Latency from request to audio playing, in seconds (None before the first measurement)."""
+        latencies = list(self.latencies)
+        return {
+            "last_latency": latencies[-1] if latencies else None,
+            "mean_latency": sum(latencies) / len(latencies) if latencies else None,
+            "max_latency": max(latencies) if latencies else None,
+            "switches": self.switches,
+            "prepared": len(self.media),
+        }
+
+    def _run(self):
+        while True:
+            batch = [self.commands.get()]
+            while not self.commands.empty():
+                batch.append(self.commands.get_nowait())
+            if None in batch:
+                break
+            # When switching quickly only the newest load matters; anything before it is stale
+            loads = [i for i, command in enumerate(batch) if command[0] == "load"]
+            if loads:
+                batch = [c for c in batch[:loads[-1]] if c[0] == "prepare"] + batch[loads[-1]:]
+            for command in batch:
+                try:
+                    getattr(self, "_" + command[0])(*command[1:])
+                except Exception as e:
+                    print(f"Error in audio {command[0]}: {e}")
+        self._shutdown()
+
+    def _start(self):
+        if self.player is None:
+            import vlc
+            if self.instance is None:
+                self.instance = vlc.Instance('--no-video')  # Disable video output
+            self.player = self.instance.media_player_new()
+            self.player.audio_set_volume(self.volume)
+            self.player.event_manager().event_attach(vlc.EventType.MediaPlayerPlaying, self._on_playing)
+
+    def _on_playing(self, event):
+        # Runs on a VLC thread, where calling back into libvlc is not allowed
+        if self._request_time is not None:
+            self.latencies.append(time.perf_counter() - self._request_time)
+            self._request_time = None
+        self._playing.set()
+
+    def _get_media(self, path):
+        import vlc
+        media = self.media.pop(path, None)
+        if media is None:
+            media = self.instance.media_new(path)
+            media.parse_with_options(vlc.MediaParseFlag.local, -1)  # Asynchronous
+        self.media[path] = media
+        while len(self.media) > self.max_prepared:
+            _, old = self.media.popitem(last=False)
+            if old is not self.current_media:
+                old.release()
+        return media
+
+    def _load(self, path, paused, start_time, requested_at):
+        self._start()
+        if self.current_media is not None and self.current_media not in self.media.values():
+            self.current_media.release()  # Evicted while it was playing
+        self.current_media = self._get_media(path)
+        self.player.set_media(self.current_media)
+        self.loaded_path = path
+        self.switches += 1
+        print(f"Loaded audio from video: {os.path.basename(path)}")
+        if paused:
+            self.player.stop()  # Starts on resume
+            return
+        self._playing.clear()
+        self._request_time = requested_at
+        self.player.play()
+        if start_time and self._playing.wait(1.0):
+            self.player.set_time(int(start_time * 1000))
+
+    def _pause(self):
+        if self.player is not None:
+            self.player.set_pause(1)
+
+    def _resume(self, requested_at, start_time):
+        if self.player is not None and self.loaded_path is not None:
+            import vlc
+            # VLC does not loop: ended media restarts from 0, so join the video where it is instead
+            ended = self.player.get_state() in (vlc.State.Ended, vlc.State.Stopped)
+            self._playing.clear()
+            self._request_time = requested_at
+            self.player.play()
+            if ended and start_time and self._playing.wait(1.0):
+                self.player.set_time(int(start_time * 1000))
+
+    def _stop(self):
+        if self.player is not None:
+            self.player.stop()
+        self.loaded_path = None
+
+    def _prepare(self, paths):
+        self._start()
+        for path in paths:
+            self._get_media(path)
+
+    def _shutdown(self):
+        if self.player is not None:
+            self.player.stop()
+            self.player.release()
+        for media in self.media.values():
+            media.release()
+        self.media.clear()
+        if self.instance is not None and self.owns_instance:
+            self.instance.release()
+
+    def release(self):
+        """Stop playback and release VLC on the worker thread."""
+        self.commands.put(None)
+        self.thread.join(timeout=2.0)
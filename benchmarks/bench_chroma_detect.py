@@ -0,0 +1,70 @@
+"""Auto-chroma detection cost: the original Counter sampler vs chroma_detect.
+
+Run from the repository root:
+    python benchmarks/bench_chroma_detect.py [iterations]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chroma_detect import detect_key_color  # noqa: E402
+
+RESOLUTIONS = {"480p": (480, 854), "1080p": (1080, 1920), "4K": (2160, 3840)}
+KEY_COLOR = (0, 255, 0)
+
+
+def make_frame(rows, cols, seed=0):
+    """Green screen with compression-like noise and a subject touching the bottom edge."""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(-6, 7, size=(rows, cols, 3))
+    frame = np.clip(np.array(KEY_COLOR, dtype=np.int16) + noise, 0, 255).astype(np.uint8)
+    frame[rows // 3:, cols // 3:2 * cols // 3] = (180, 60, 150)
+    return frame
+
+
+def legacy_detect(frame_rgb):
+    """The tolist()/Counter edge sampler auto_detect_chroma used before."""
+    edge_pixels = []
+    edge_pixels.extend(frame_rgb[0, 10:-10].tolist())
+    edge_pixels.extend(frame_rgb[-1, 10:-10].tolist())
+    edge_pixels.extend(frame_rgb[10:-10, 0].tolist())
+    edge_pixels.extend(frame_rgb[10:-10, -1].tolist())
+    edge_pixels = [tuple(pixel) for pixel in edge_pixels]
+    return Counter(edge_pixels).most_common(1)[0][0]
+
+
+def time_call(func, iterations):
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - start) / iterations * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("iterations", nargs="?", type=int, default=20, help="timed runs per variant")
+    iterations = parser.parse_args().iterations
+    variants = [
+        ("legacy Counter", legacy_detect),
+        ("border exact", lambda f: detect_key_color([f], bits=8, border=1)),
+        ("border 5-bit", lambda f: detect_key_color([f], bits=5)),
+        ("frame 6-bit", lambda f: detect_key_color([f], whole_frame=True, bits=6)),
+        ("frame exact", lambda f: detect_key_color([f], whole_frame=True, bits=8)),
+    ]
+    print(f"{'resolution':<10} {'method':<15} {'ms/frame':>9}  result")
+    for label, (rows, cols) in RESOLUTIONS.items():
+        frame = make_frame(rows, cols)
+        for name, func in variants:
+            ms, result = time_call(lambda: func(frame), iterations)
+            print(f"{label:<10} {name:<15} {ms:9.3f}  {result}")
+
+
+if __name__ == "__main__":
+    main()
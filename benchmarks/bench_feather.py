@@ -0,0 +1,66 @@
+"""Cost of the alpha-plane key path and edge feathering relative to the plain key.
+
+Per backend, times the plain in-place key (keyer.apply), the same key through
+a KeyedFrame (mask -> alpha plane -> composite) with feathering off, and with
+feathering at each radius, all on a copy of the same frame. The plain key and
+the unfeathered KeyedFrame must produce identical bytes. For reference it
+also times one full-frame copy of the RGB frame.
+
+Run from the repository root:
+    python benchmarks/bench_feather.py [iterations] [--resolution 1080p]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_chroma_key import KEY_COLOR, RESOLUTIONS, TOLERANCE, make_frame, time_call  # noqa: E402
+from chroma_key import available_backends, create_keyer  # noqa: E402
+from keyed_frame import FEATHER_STEPS, KeyedFrame  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("iterations", nargs="?", type=int, default=20)
+    parser.add_argument("--resolution", default="1080p", choices=list(RESOLUTIONS))
+    args = parser.parse_args()
+    rows, cols = RESOLUTIONS[args.resolution]
+    frame = make_frame(rows, cols)
+    out = np.empty_like(frame)
+    copy_ms = time_call(lambda: np.copyto(out, frame), args.iterations)
+    print(f"{args.resolution}, key {KEY_COLOR}, tolerance {TOLERANCE}; full-frame copy {copy_ms:.2f} ms")
+    print(f"{'backend':<10} {'path':<16} {'ms':>8} {'vs plain':>9} {'feather ms':>11} {'edge px':>8}")
+    for name in available_backends():
+        keyer = create_keyer(name)
+        keyer.set_key(KEY_COLOR, TOLERANCE)
+
+        def plain():
+            np.copyto(out, frame)
+            keyer.apply(out)
+
+        plain()
+        expected = out.copy()
+        plain_ms = time_call(plain, args.iterations)
+        print(f"{name:<10} {'plain key':<16} {plain_ms:8.2f} {1.0:9.2f}")
+        for feather in FEATHER_STEPS:
+            keyed_frame = KeyedFrame(feather)
+
+            def alpha_path():
+                np.copyto(out, frame)
+                keyed_frame.apply(out, keyer)
+
+            alpha_path()
+            if feather == 0 and not np.array_equal(out, expected):
+                raise Exception(f"{name}: the alpha-plane key differs from the plain key")
+            elapsed = time_call(alpha_path, args.iterations)
+            edge = np.count_nonzero((keyed_frame.alpha > 0) & (keyed_frame.alpha < 255))
+            feather_ms = time_call(keyed_frame.feather_edges, args.iterations) if feather else 0.0
+            label = f"alpha, feather {feather}" if feather else "alpha plane"
+            print(f"{name:<10} {label:<16} {elapsed:8.2f} {elapsed / plain_ms:9.2f} {feather_ms:11.2f} {edge:8d}")
+
+
+if __name__ == "__main__":
+    main()
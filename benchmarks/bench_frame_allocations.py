@@ -0,0 +1,96 @@
+"""Per-frame allocation cost of the frame path, measured with tracemalloc.
+
+Compares the pre-rework chain (cvtColor -> rot90 -> make_surface -> blit ->
+scale -> copy -> pixels3d) against DesktopVideoOverlay.process_frame, which
+scales and keys into buffers allocated once per video/window size.
+
+Run from the repository root:
+    python benchmarks/bench_frame_allocations.py [frames]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import headless  # noqa: E402  (must come before pygame/overlay imports)
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+SIZES = [(854, 480), (1920, 1080)]
+SCALES = [1.0, 0.5]
+
+
+def legacy_frame(overlay, frame_rgb, state):
+    """The frame chain draw_frame used before buffers were made persistent."""
+    if "bgr" not in state:
+        state["bgr"] = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
+    frame_bgr = state["bgr"]
+    frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    frame_surface = pygame.surfarray.make_surface(np.rot90(frame))
+    if "temp" not in state:
+        state["temp"] = pygame.Surface((frame.shape[1], frame.shape[0]))
+    temp_surface = state["temp"]
+    temp_surface.fill(overlay.transparency_color)
+    temp_surface.blit(frame_surface, (0, 0))
+    scaled = state.get("scaled")
+    if scaled is None or scaled.get_size() != (overlay.width, overlay.height):
+        scaled = state["scaled"] = pygame.transform.scale(temp_surface, (overlay.width, overlay.height))
+    else:
+        pygame.transform.scale(temp_surface, (overlay.width, overlay.height), scaled)
+    transparent_surface = scaled.copy()
+    surf_array = pygame.surfarray.pixels3d(transparent_surface)
+    tr = np.array(overlay.transparency_color)
+    mask = np.sqrt(np.sum((surf_array - tr) ** 2, axis=2)) <= overlay.color_tolerance
+    surf_array[mask] = overlay.transparency_color
+    del surf_array
+    overlay.screen.blit(transparent_surface, (0, 0))
+
+
+def current_frame(overlay, frame_rgb, state):
+    overlay.process_frame(frame_rgb)
+    overlay.screen.blit(overlay.frame_surface, (0, 0))
+
+
+def measure(step, overlay, frame_rgb, frames):
+    """Return (mean peak transient bytes, retained blocks) per frame."""
+    state = {}
+    for _ in range(3):
+        step(overlay, frame_rgb, state)  # Warm-up: first-use allocations
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peak_total = 0
+    for _ in range(frames):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step(overlay, frame_rgb, state)
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "lineno") if stat.count_diff > 0)
+    return peak_total / frames, retained / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("frames", nargs="?", type=int, default=30, help="frames traced per path")
+    frames = parser.parse_args().frames
+    print(f"{'source':<10} {'scale':>5} {'path':<8} {'peak KiB/frame':>15} {'blocks/frame':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in SIZES:
+            clip = headless.make_clip(os.path.join(tmp, f"clip_{height}.avi"), width, height, frames=10)
+            for scale in SCALES:
+                overlay = headless.make_overlay([clip], scale_factor=scale, transparency_color=headless.KEY_COLOR)
+                frame_rgb = headless.next_decoded_frame(overlay).copy()
+                for name, step in (("legacy", legacy_frame), ("current", current_frame)):
+                    peak, blocks = measure(step, overlay, frame_rgb, frames)
+                    print(f"{height:>5}p{'':<4} {scale:5.2f} {name:<8} {peak / 1024:15.1f} {blocks:13.2f}")
+                overlay.video.release()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""CPU used by the main loop while paused, with and without idle rendering.
+
+Run from the repository root:
+    python benchmarks/bench_idle.py [seconds]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import headless  # noqa: E402  (must come before pygame/overlay imports)
+import pygame  # noqa: E402
+
+
+def paused_cpu(overlay, seconds):
+    """Run the real main loop for `seconds` of wall time and return CPU % and redraw count."""
+    flips = overlay.profiler.counts.get("flip", 0)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < seconds:
+        overlay.step()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return 100.0 * cpu / wall, overlay.profiler.counts.get("flip", 0) - flips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("seconds", nargs="?", type=float, default=3.0, help="wall time per mode")
+    seconds = parser.parse_args().seconds
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = headless.make_clip(os.path.join(tmp, "idle.avi"), 1280, 720, frames=30)
+        overlay = headless.make_overlay([clip], transparency_color=headless.KEY_COLOR)
+        headless.next_decoded_frame(overlay)
+        overlay.is_playing = False  # As if Space had been pressed
+        overlay.clock.pause()
+        print(f"{'mode':<18} {'CPU %':>7} {'redraws':>8}")
+        for idle in (False, True):
+            overlay.idle_rendering = idle
+            cpu, redraws = paused_cpu(overlay, seconds)
+            print(f"{'idle rendering' if idle else 'redraw at 60 Hz':<18} {cpu:7.2f} {redraws:8d}")
+        overlay.video.release()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
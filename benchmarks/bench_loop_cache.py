@@ -0,0 +1,88 @@
+"""Per-frame cost of playing a short loop from the keyed loop cache versus decoding it.
+
+Plays a synthetic clip in real time on the headless overlay for a few loops,
+once with the loop cache and once without, and reports the mean and worst
+frame time per loop (the worst frame shows the hitch at the wrap). Also
+checks the cached output matches the decoded output frame for frame.
+
+Run from the repository root:
+    python benchmarks/bench_loop_cache.py [--resolution 720p] [--seconds 2] [--loops 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import headless  # noqa: E402  (must come before pygame/overlay imports)
+import pygame  # noqa: E402
+
+from bench_pipeline import RESOLUTIONS  # noqa: E402
+
+
+def play(clip, loops, loop_caching):
+    """Return per-loop lists of draw_frame times (ms) for frames that presented a new image."""
+    overlay = headless.make_overlay([clip], transparency_color=headless.KEY_COLOR,
+                                    loop_caching=loop_caching, disk_caching=False)
+    per_loop = [[] for _ in range(loops)]
+    outputs = {}
+    loop_duration = None
+    while True:
+        start = time.perf_counter()
+        before = overlay.cached_index if overlay.cached_loop else overlay.video.current_time
+        overlay.draw_frame()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        after = overlay.cached_index if overlay.cached_loop else overlay.video.current_time
+        overlay.present()
+        if overlay.clock.started and after is not None and after != before:
+            loop_duration = loop_duration or overlay.video.loop_duration
+            media_time = overlay.clock.time()
+            loop = int(media_time // loop_duration) if loop_duration else 0
+            if loop >= loops:
+                break
+            per_loop[loop].append(elapsed)
+            index = overlay.cached_index if overlay.cached_loop else overlay.video.current_position[0]
+            outputs.setdefault(index, overlay.frame_buffer.copy())
+        overlay.wait_for_next_frame()
+    stats = overlay.loop_cache.stats()
+    overlay.video.release()
+    overlay.prefetcher.release()
+    overlay.chroma_detector.release()
+    overlay.frame_pool.release()
+    return per_loop, outputs, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolution", default="720p", choices=list(RESOLUTIONS))
+    parser.add_argument("--seconds", type=float, default=2.0, help="clip length")
+    parser.add_argument("--loops", type=int, default=3)
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.resolution]
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = headless.make_clip(os.path.join(tmp, "loop.avi"), width, height, frames=int(args.seconds * 30))
+        results = {}
+        for label, caching in (("decoded", False), ("cached", True)):
+            results[label] = play(clip, args.loops, caching)
+    pygame.quit()
+
+    print(f"\n{'mode':<8} {'loop':>4} {'frames':>6} {'mean ms':>8} {'max ms':>8}")
+    for label, (per_loop, _, stats) in results.items():
+        for loop, times in enumerate(per_loop):
+            if times:
+                print(f"{label:<8} {loop:>4} {len(times):>6} {np.mean(times):8.2f} {max(times):8.2f}")
+        if label == "cached":
+            print(f"cache: {stats}")
+    decoded, cached = results["decoded"][1], results["cached"][1]
+    mismatched = [i for i in cached if i in decoded and not np.array_equal(cached[i], decoded[i])]
+    print("cached output matches decoded output" if not mismatched
+          else f"MISMATCH at frames {mismatched[:10]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""CPU and memory of N overlays in one process (multi_overlay) versus N separate processes.
+
+Each configuration runs in fresh child processes on the headless display
+(windowless overlays, no audio, caches off) playing a synthetic clip in real
+time. Reports total CPU as a share of one core, summed peak RSS and frames
+presented per second.
+
+Run from the repository root (Linux; uses the resource module):
+    python benchmarks/bench_multi_overlay.py [--counts 1,4,8] [--seconds 5] [--resolution 480p]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RESOLUTIONS = {"360p": (640, 360), "480p": (854, 480), "720p": (1280, 720)}
+
+
+def child_multi(clip, count, seconds):
+    import headless  # noqa: F401  (dummy display, stubbed vlc)
+    from multi_overlay import MultiOverlay
+    group = MultiOverlay([[clip]] * count, windowed=False, audio=False, transparency_color=headless.KEY_COLOR)
+    cpu_start, deadline = time.process_time(), time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        group.step()
+    result = {"cpu": time.process_time() - cpu_start, "frames": group.frames_presented}
+    group.release()
+    return result
+
+
+def child_single(clip, seconds):
+    import headless
+    overlay = headless.make_overlay([clip], transparency_color=headless.KEY_COLOR,
+                                    loop_caching=False, disk_caching=False)
+    frames = 0
+    cpu_start, deadline = time.process_time(), time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        before = overlay.video.current_time
+        overlay.draw_frame()
+        overlay.present()
+        frames += overlay.video.current_time != before
+        overlay.wait_for_next_frame()
+    return {"cpu": time.process_time() - cpu_start, "frames": frames}
+
+
+def spawn(*args):
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", *map(str, args)],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+
+def collect(processes):
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: sum(result[key] for result in results) for key in ("cpu", "frames", "rss_mb")}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        mode, clip, seconds = sys.argv[2], sys.argv[3], float(sys.argv[4])
+        result = child_multi(clip, int(sys.argv[5]), seconds) if mode == "multi" else child_single(clip, seconds)
+        result["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps(result))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", default="1,4,8")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--resolution", default="480p", choices=list(RESOLUTIONS))
+    args = parser.parse_args()
+
+    import headless
+    width, height = RESOLUTIONS[args.resolution]
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'overlays':>8} {'mode':<10} {'CPU':>7} {'RSS MB':>8} {'fps':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = headless.make_clip(os.path.join(tmp, "clip.avi"), width, height, frames=90)
+        for count in (int(c) for c in args.counts.split(",")):
+            runs = {
+                "one proc": collect([spawn("multi", clip, args.seconds, count)]),
+                "separate": collect([spawn("single", clip, args.seconds) for _ in range(count)]),
+            }
+            for mode, result in runs.items():
+                print(f"{count:>8} {mode:<10} {result['cpu'] / args.seconds:7.0%} {result['rss_mb']:8.0f} "
+                      f"{result['frames'] / args.seconds:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Headless frame-pipeline benchmark for tracking frames/sec and allocation regressions.
+
+Generates synthetic green-screen clips with cv2.VideoWriter, then drives the
+real DesktopVideoOverlay (headless window backend, pystray/vlc stubbed) as
+fast as frames can be decoded, keyed and presented.
+
+Run from the repository root:
+    python benchmarks/bench_pipeline.py [--resolutions 480p,1080p] [--frames 240]
+                                        [--scales 0.25,0.5,1,2] [--policies scale_then_key,key_then_scale]
+                                        [--output results.json] [--baseline results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import headless  # noqa: E402  (must come before pygame/overlay imports)
+import pygame  # noqa: E402
+
+from frame_profiler import FrameProfiler  # noqa: E402
+
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def unpaced(overlay):
+    """Make draw_frame take every decoded frame in order as soon as it is ready."""
+    overlay.read_due_frame = lambda: (True, headless.next_decoded_frame(overlay))
+
+
+def reset_profiler(overlay):
+    overlay.profiler = FrameProfiler(window=4096)
+    overlay.video.profiler = overlay.profiler
+
+
+def run_frames(overlay, frames):
+    for _ in range(frames):
+        overlay.draw_frame()
+        overlay.present()
+
+
+def bench_clip(clip, frames, scale, incremental=False, scale_policy="scale_then_key"):
+    overlay = headless.make_overlay([clip], scale_factor=scale, transparency_color=headless.KEY_COLOR,
+                                    incremental_rendering=incremental, loop_caching=False,
+                                    disk_caching=False)
+    overlay.set_scale_policy(scale_policy)
+    unpaced(overlay)
+    run_frames(overlay, 10)  # Warm-up: JIT, scratch buffers, first decodes
+    reset_profiler(overlay)
+    overlay.tile_tracker.reset_stats()
+    start = time.perf_counter()
+    run_frames(overlay, frames)
+    fps = frames / (time.perf_counter() - start)
+    stages = overlay.profiler.summary()
+    tiles_skipped = overlay.tile_tracker.skip_ratio
+
+    # Allocation pass, separate because tracemalloc slows everything down
+    alloc_frames = max(10, frames // 8)
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(alloc_frames):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run_frames(overlay, 1)
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    overlay.video.release()
+    overlay.prefetcher.release()
+    overlay.chroma_detector.release()
+    return {
+        "fps": fps,
+        "alloc_peak_kib": peak_total / alloc_frames / 1024,
+        "tiles_skipped": tiles_skipped,
+        "stages": stages,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages versus a previous run."""
+    regressions = []
+    for label, result in results.items():
+        base = baseline.get(label)
+        if not base:
+            continue
+        if result["fps"] < base["fps"] * (1 - threshold):
+            regressions.append(f"{label}: {result['fps']:.1f} fps vs {base['fps']:.1f} baseline")
+        if result["alloc_peak_kib"] > base["alloc_peak_kib"] * (1 + threshold) + 1.0:
+            regressions.append(f"{label}: {result['alloc_peak_kib']:.1f} KiB/frame allocated "
+                               f"vs {base['alloc_peak_kib']:.1f} baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolutions", default="480p,720p,1080p",
+                        help="comma-separated subset of " + ", ".join(RESOLUTIONS))
+    parser.add_argument("--scales", default="1.0", help="comma-separated overlay scale factors")
+    parser.add_argument("--frames", type=int, default=240, help="frames timed per run")
+    parser.add_argument("--policies", default="scale_then_key",
+                        help="comma-separated scale policies (scale_then_key, key_then_scale)")
+    parser.add_argument("--incremental", action="store_true", help="also run with incremental rendering")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.resolutions.split(","):
+            width, height = RESOLUTIONS[name]
+            clip = headless.make_clip(os.path.join(tmp, f"{name}.avi"), width, height, frames=90)
+            policies = args.policies.split(",")
+            for scale in (float(s) for s in args.scales.split(",")):
+                label = f"{name}@{scale:g}x"
+                for policy in policies:
+                    suffix = "" if len(policies) == 1 else "/" + policy.split("_")[0]
+                    results[label + suffix] = bench_clip(clip, args.frames, scale, scale_policy=policy)
+                if args.incremental:
+                    results[label + "+inc"] = bench_clip(clip, args.frames, scale, incremental=True)
+    pygame.quit()
+
+    print(f"\n{'run':<22} {'fps':>8} {'KiB/frame':>10} {'skipped':>8}  stage p50 ms")
+    for label, result in results.items():
+        stages = "  ".join(f"{stage} {stats['p50']:.2f}" for stage, stats in result["stages"].items())
+        print(f"{label:<22} {result['fps']:8.1f} {result['alloc_peak_kib']:10.1f} "
+              f"{result['tiles_skipped']:8.0%}  {stages}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
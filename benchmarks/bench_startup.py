@@ -0,0 +1,123 @@
+"""Time to first frame of the overlay, with and without a stored clip profile.
+
+Starts the headless overlay in a fresh process for each run and reports the
+time from the overlay module's import to its first frame on screen, and from
+process spawn as the parent saw it. Runs with auto-chroma on, once per
+scenario: no stored profile (a quick estimate from the first frame, then
+multi-frame detection in the background), a stored profile (detection is
+skipped), and with auto-chroma off for reference. Also
+reports the import cost of the modules now loaded after the first frame,
+each measured in a fresh interpreter.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--resolution 1080p] [--runs 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFERRED_MODULES = ("tkinter", "PIL.Image", "pystray", "vlc")
+
+
+def child(clip, auto_chroma):
+    """Start an overlay on clip, step it until the first frame is shown and print its timings as JSON."""
+    sys.path.insert(0, HERE)
+    import headless
+    overlay = headless.make_overlay([clip], warm_keyer=False, auto_chroma_enabled=auto_chroma,
+                                    loop_caching=False, disk_caching=False)
+    deadline = time.perf_counter() + 10.0
+    while overlay.time_to_first_frame is None and time.perf_counter() < deadline:
+        overlay.step()
+    print(json.dumps({"first_frame": overlay.time_to_first_frame, "cpu": time.process_time()}), flush=True)
+    overlay.video.release()
+    overlay.prefetcher.release()
+    overlay.chroma_detector.release()
+    overlay.frame_pool.release()
+    overlay.disk_cache.release()
+    os._exit(0)  # Skip interpreter teardown; it is not part of start-up
+
+
+def spawn(clip, auto_chroma, env):
+    """(seconds from spawn to first frame, in-process time to first frame, CPU seconds used by then)."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", clip]
+    if auto_chroma:
+        command.append("--auto-chroma")
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env)
+    result = None
+    for line in process.stdout:
+        if line.startswith("{"):
+            result = json.loads(line)
+            break
+    wall = time.perf_counter() - start
+    process.wait()
+    if result is None or result["first_frame"] is None:
+        raise Exception("The overlay did not show a frame")
+    return wall, result["first_frame"], result["cpu"]
+
+
+def import_cost(module):
+    """Milliseconds to import module in a fresh interpreter, or None if it is not installed."""
+    code = (f"import time; t = time.perf_counter()\n"
+            f"try:\n    import {module}\nexcept ImportError:\n    print('missing')\n"
+            f"else:\n    print((time.perf_counter() - t) * 1000)")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True).stdout.strip()
+    return None if output == "missing" else float(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolution", default="1080p")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--auto-chroma", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.auto_chroma)
+        return
+
+    sys.path.insert(0, HERE)
+    from bench_pipeline import RESOLUTIONS
+    import headless  # Only for make_clip; the children import it themselves
+    from chroma_detect import detect_key_color, sample_frames
+    from clip_profiles import ClipProfiles
+    width, height = RESOLUTIONS[args.resolution]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DVO_CACHE_DIR=os.path.join(tmp, "cache"))
+        profiles_path = os.path.join(tmp, "cache", "profiles.json")
+        clip = headless.make_clip(os.path.join(tmp, "clip.avi"), width, height, frames=90)
+        for label, auto_chroma, keep_profile in (("no profile", True, False), ("profile", True, True),
+                                                 ("manual key", False, True)):
+            if keep_profile:
+                # Store the profile a previous run would have left behind
+                color, tolerance = detect_key_color(sample_frames(clip))
+                profiles = ClipProfiles(profiles_path)
+                profiles.update(clip, key_color=color, tolerance=tolerance)
+                profiles.save()
+            runs = []
+            for _ in range(args.runs):
+                if not keep_profile and os.path.exists(profiles_path):
+                    os.remove(profiles_path)
+                runs.append(spawn(clip, auto_chroma, env))
+            results[label] = runs
+
+    print(f"\n{'scenario':<12} {'spawn->frame ms':>16} {'import->frame ms':>17} {'CPU ms':>8}")
+    for label, runs in results.items():
+        wall, first_frame, cpu = np.array(runs).T * 1000
+        print(f"{label:<12} {np.median(wall):16.0f} {np.median(first_frame):17.0f} {np.median(cpu):8.0f}")
+    print("\nimports deferred until after the first frame (fresh interpreter each):")
+    for module in DEFERRED_MODULES:
+        cost = import_cost(module)
+        print(f"  {module:<10} {'not installed' if cost is None else f'{cost:.0f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Scaling benchmark for striped conversion + keying on the frame pool.
+
+Times BGR->RGB conversion followed by mask-apply at 1, 2, 4 and 8 workers
+and checks every result is byte-identical to the serial path.
+
+Run from the repository root:
+    python benchmarks/bench_striped_key.py [iterations] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_chroma_key import KEY_COLOR, RESOLUTIONS, TOLERANCE, make_frame, time_call  # noqa: E402
+from chroma_key import available_backends, create_keyer  # noqa: E402
+from frame_pool import FramePool, StripedKeyer  # noqa: E402
+
+
+def serial(frame_bgr, out, keyer):
+    cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=out)
+    keyer.apply(out)
+
+
+def striped(frame_bgr, out, pool, keyer):
+    pool.convert(frame_bgr, cv2.COLOR_BGR2RGB, out)
+    keyer.apply(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("iterations", nargs="?", type=int, default=10)
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--resolutions", default="1080p,4K")
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    print(f"CPUs: {os.cpu_count()}; backends: {', '.join(available_backends())}")
+    print(f"{'resolution':<10} {'backend':<10} {'workers':>7} {'ms':>8} {'speedup':>8}")
+    for label in args.resolutions.split(","):
+        rows, cols = RESOLUTIONS[label]
+        frame_bgr = make_frame(rows, cols)[..., ::-1].copy()
+        for name in available_backends():
+            keyer = create_keyer(name)
+            keyer.set_key(KEY_COLOR, TOLERANCE)
+            expected = np.empty((rows, cols, 3), dtype=np.uint8)
+            serial(frame_bgr, expected, keyer)
+            out = np.empty_like(expected)
+            baseline = time_call(lambda: serial(frame_bgr, out, keyer), args.iterations)
+            print(f"{label:<10} {name:<10} {'serial':>7} {baseline:8.2f} {1.0:8.2f}")
+            for workers in worker_counts:
+                pool = FramePool(workers)
+                striped_keyer = StripedKeyer(name, pool)
+                striped_keyer.set_key(KEY_COLOR, TOLERANCE)
+                striped(frame_bgr, out, pool, striped_keyer)
+                if not np.array_equal(out, expected):
+                    raise Exception(f"{name} with {workers} workers differs from the serial path")
+                elapsed = time_call(lambda: striped(frame_bgr, out, pool, striped_keyer), args.iterations)
+                print(f"{label:<10} {name:<10} {workers:>7} {elapsed:8.2f} {baseline / elapsed:8.2f}")
+                pool.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Drive DesktopVideoOverlay without a display, window manager or audio device.
+
+Importing this module selects SDL's dummy video driver and replaces pystray
+and python-vlc with stubs; overlays are created with the HeadlessWindow
+backend, so the real frame pipeline can be benchmarked on a Linux box.
+"""
+import os
+import sys
+from unittest import mock
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+for _name in ("pystray", "vlc"):
+    sys.modules[_name] = mock.MagicMock(name=_name)
+# The stub audio player never reports itself as playing, so frames follow the wall clock
+sys.modules["vlc"].Instance.return_value.media_player_new.return_value.is_playing.return_value = 0
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+import DesktopVideoOverlay as overlay_module  # noqa: E402
+from window_backend import HeadlessWindow  # noqa: E402
+
+KEY_COLOR = (0, 255, 0)
+
+
+def make_clip(path, width, height, frames=60, fps=30):
+    """Write a synthetic green-screen clip with a moving subject and return its path."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    if not writer.isOpened():
+        raise Exception(f"Could not create video file {path}")
+    rng = np.random.default_rng(0)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    subject_w, subject_h = max(8, width // 5), max(8, height // 2)
+    for i in range(frames):
+        frame[:] = KEY_COLOR[::-1]  # VideoWriter takes BGR
+        x = (i * width // frames) % max(1, width - subject_w)
+        y = height // 4
+        frame[y:y + subject_h, x:x + subject_w] = rng.integers(0, 200, size=3, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def make_overlay(video_paths, warm_keyer=True, **settings):
+    """Create a DesktopVideoOverlay on the dummy display playing video_paths.
+
+    settings are assigned as attributes before the first clip is loaded.
+    warm_keyer loads numba straight away, as the app does after its first
+    frame, so benchmarks measure the steady-state keyer.
+    """
+    def select_video(self):
+        for name, value in settings.items():
+            setattr(self, name, value)
+        self.video_paths = list(video_paths)
+        self.current_video_index = 0
+        self.load_video()
+
+    cls = overlay_module.DesktopVideoOverlay
+    with mock.patch.object(cls, "select_video", select_video), \
+            mock.patch.object(cls, "setup_tray_icon", lambda self: None):
+        overlay = cls(window=HeadlessWindow())
+    overlay.setup_tray_icon = lambda: None  # The tray starts after the first frame, outside the patch
+    if warm_keyer and overlay_module.warm_numba():
+        overlay.use_warm_keyer()
+    return overlay
+
+
+def next_decoded_frame(overlay, timeout=5.0):
+    """Block until the decode worker hands out a frame."""
+    import time
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        ret, frame = overlay.video.read()
+        if ret:
+            return frame
+        time.sleep(0.001)
+    raise Exception("Timed out waiting for a decoded frame")
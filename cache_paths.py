@@ -0,0 +1,10 @@
+"""Where the app keeps its per-user cache files (frame cache, clip profiles)."""
+import os
+
+
+def cache_root():
+    """Per-user cache directory of the app; DVO_CACHE_DIR overrides it."""
+    if os.environ.get("DVO_CACHE_DIR"):
+        return os.environ["DVO_CACHE_DIR"]
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "DesktopVideoOverlay")
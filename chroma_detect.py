@@ -0,0 +1,139 @@
+"""Key colour detection from packed colour histograms.
+
+Pixels are packed into uint32 codes (optionally quantised to fewer bits per
+channel to absorb compression noise) and counted with np.bincount/np.unique,
+so no per-pixel Python objects are created.
+"""
+import math
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+
+def pack_colors(pixels, bits=8):
+    """Pack (..., 3) uint8 RGB pixels into uint32 codes using `bits` bits per channel."""
+    pixels = pixels.reshape(-1, 3).astype(np.uint32)
+    if bits < 8:
+        pixels >>= 8 - bits
+    return (pixels[:, 0] << (2 * bits)) | (pixels[:, 1] << bits) | pixels[:, 2]
+
+
+def border_pixels(frame_rgb, width=1, margin=10):
+    """Return the edge strips of a frame as an (n, 3) array, skipping `margin` pixels at the corners."""
+    rows, cols = frame_rgb.shape[:2]
+    strips = (
+        frame_rgb[:width, margin:cols - margin],  # Top edge
+        frame_rgb[rows - width:, margin:cols - margin],  # Bottom edge
+        frame_rgb[margin:rows - margin, :width],  # Left edge
+        frame_rgb[margin:rows - margin, cols - width:],  # Right edge
+    )
+    return np.concatenate([strip.reshape(-1, 3) for strip in strips])
+
+
+def dominant_color(pixels, bits=8):
+    """Return the most common colour; with bits < 8, the mean colour of the most common bin."""
+    codes = pack_colors(pixels, bits)
+    if bits <= 6:
+        # At most 2 ** 18 bins, cheap enough for a dense histogram
+        code = np.bincount(codes, minlength=1 << (3 * bits)).argmax()
+    else:
+        values, counts = np.unique(codes, return_counts=True)
+        code = values[counts.argmax()]
+    pixels = pixels.reshape(-1, 3)
+    members = codes == code
+    if bits >= 8:
+        return tuple(int(c) for c in pixels[members.argmax()])
+    # Mean colour of the bin; a matrix product beats a strided axis-0 reduction here
+    return tuple(int(c) for c in np.rint(members.astype(np.float64) @ pixels / members.sum()))
+
+
+def suggest_tolerance(pixels, color, cluster_radius=60, percentile=99, minimum=10, maximum=120):
+    """Suggest a Euclidean tolerance covering the spread of the pixels clustered around color."""
+    diff = pixels.reshape(-1, 3).astype(np.float32) - np.array(color, dtype=np.float32)
+    np.square(diff, out=diff)
+    squared = diff @ np.ones(3, dtype=np.float32)  # Exact: integer sums stay below 2 ** 24
+    cluster = squared[squared <= cluster_radius * cluster_radius]
+    if cluster.size == 0:
+        return minimum
+    k = max(0, math.ceil(cluster.size * percentile / 100) - 1)
+    spread = math.sqrt(float(np.partition(cluster, k)[k]))
+    return max(minimum, min(maximum, math.ceil(spread) + 2))
+
+
+def detect_key_color(frames, whole_frame=False, bits=5, border=2, margin=10, stride=4):
+    """Estimate the key colour and a suggested tolerance from one or more RGB frames.
+
+    Samples the border of each frame, or every `stride`-th pixel of the whole
+    frame when whole_frame is set. Returns (color, tolerance).
+    """
+    samples = []
+    for frame_rgb in frames:
+        if whole_frame:
+            samples.append(frame_rgb[::stride, ::stride].reshape(-1, 3))
+        else:
+            samples.append(border_pixels(frame_rgb, border, margin))
+    pixels = np.concatenate(samples)
+    color = dominant_color(pixels, bits)
+    return color, suggest_tolerance(pixels, color)
+
+
+def sample_frames(video_path, count=5):
+    """Read up to count RGB frames spread evenly through a clip using a private capture."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception("Could not open video file")
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        positions = sorted(set(np.linspace(0, max(total - 1, 0), count).astype(int).tolist()))
+        frames = []
+        for position in positions:
+            if position:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+            ret, frame = cap.read()
+            if ret:
+                frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return frames
+    finally:
+        cap.release()
+
+
+class ChromaDetector:
+    """Multi-frame key colour detection, run on a background thread with its own capture."""
+
+    def __init__(self, frame_count=5, whole_frame=False, bits=5):
+        self.frame_count = frame_count
+        self.whole_frame = whole_frame
+        self.bits = bits
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def detect(self, video_path):
+        """Sample the clip and return (color, tolerance), or None if no frame could be read."""
+        frames = sample_frames(video_path, self.frame_count)
+        if not frames:
+            return None
+        return detect_key_color(frames, self.whole_frame, self.bits)
+
+    def request(self, video_path, callback):
+        """Detect in the background and call callback(video_path, result) from the worker thread."""
+        self.requests.put((video_path, callback))
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            video_path, callback = request
+            try:
+                result = self.detect(video_path)
+            except Exception as e:
+                print(f"Chroma detection failed for {os.path.basename(video_path)}: {e}")
+                result = None
+            callback(video_path, result)
+
+    def release(self):
+        self.requests.put(None)
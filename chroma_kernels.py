@@ -0,0 +1,74 @@
+"""numba kernels for chroma_key, kept apart so importing numba (about 0.3 s) waits until a keyer needs it."""
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True, nogil=True)
+def key_pixels(rgb, key_r, key_g, key_b, threshold, mask, write):
+    rows, cols = mask.shape
+    for y in range(rows):
+        for x in range(cols):
+            dr = np.int32(rgb[y, x, 0]) - key_r
+            dg = np.int32(rgb[y, x, 1]) - key_g
+            db = np.int32(rgb[y, x, 2]) - key_b
+            keyed = dr * dr + dg * dg + db * db <= threshold
+            mask[y, x] = keyed
+            if keyed and write:
+                rgb[y, x, 0] = key_r
+                rgb[y, x, 1] = key_g
+                rgb[y, x, 2] = key_b
+
+
+@numba.njit(cache=True, nogil=True)
+def key_pixels_lut(rgb, bits, key_r, key_g, key_b, mask, write):
+    rows, cols = mask.shape
+    for y in range(rows):
+        for x in range(cols):
+            index = (np.int32(rgb[y, x, 0]) << 16) | (np.int32(rgb[y, x, 1]) << 8) | np.int32(rgb[y, x, 2])
+            keyed = (bits[index >> 3] >> (index & 7)) & 1 == 1
+            mask[y, x] = keyed
+            if keyed and write:
+                rgb[y, x, 0] = key_r
+                rgb[y, x, 1] = key_g
+                rgb[y, x, 2] = key_b
+
+
+@numba.njit(cache=True, nogil=True)
+def composite_alpha(rgb, alpha, key_r, key_g, key_b, cutoff, high_r, high_g, high_b):
+    rows, cols = alpha.shape
+    spill = high_r or high_g or high_b
+    for y in range(rows):
+        for x in range(cols):
+            a = np.int32(alpha[y, x])
+            if a <= cutoff:
+                rgb[y, x, 0] = key_r
+                rgb[y, x, 1] = key_g
+                rgb[y, x, 2] = key_b
+            elif a < 255 and spill:
+                r = np.int32(rgb[y, x, 0])
+                g = np.int32(rgb[y, x, 1])
+                b = np.int32(rgb[y, x, 2])
+                # How far the key's strong channels stand above the others
+                strong = 255
+                low = 0
+                if high_r:
+                    strong = min(strong, r)
+                else:
+                    low = max(low, r)
+                if high_g:
+                    strong = min(strong, g)
+                else:
+                    low = max(low, g)
+                if high_b:
+                    strong = min(strong, b)
+                else:
+                    low = max(low, b)
+                excess = strong - low
+                if excess > 0:
+                    excess = (excess * (255 - a) + 127) // 255
+                    if high_r:
+                        rgb[y, x, 0] = r - excess
+                    if high_g:
+                        rgb[y, x, 1] = g - excess
+                    if high_b:
+                        rgb[y, x, 2] = b - excess
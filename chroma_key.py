@@ -0,0 +1,389 @@
+"""Chroma key masks for RGB frames.
+
+Every backend reproduces the original Euclidean test
+``sqrt(sum((pixel - key) ** 2)) <= tolerance`` bit for bit, but compares
+integer squared distances against a precomputed threshold and writes into
+scratch buffers that are reused for as long as the frame size stays the same.
+
+The LUT backend also offers other key metrics (see KEY_METRICS): it
+precomputes which of the 256 ** 3 colours are keyed, so any metric costs the
+same single table lookup per pixel.
+"""
+import importlib.util
+import math
+import threading
+
+import cv2
+import numpy as np
+
+# Optional JIT backend; chroma_kernels (and numba) is imported by the first keyer that needs it
+NUMBA_INSTALLED = importlib.util.find_spec("numba") is not None
+_kernels_lock = threading.Lock()
+
+
+def numba_kernels():
+    """The chroma_kernels module, imported on first use; None without numba."""
+    if not NUMBA_INSTALLED:
+        return None
+    with _kernels_lock:
+        import chroma_kernels
+    return chroma_kernels
+
+
+def warm_numba():
+    """Import numba and compile (or load from its cache) the kernels, off the caller's critical path.
+
+    The first call of each kernel otherwise costs about half a second.
+    Returns whether numba is usable.
+    """
+    kernels = numba_kernels()
+    if kernels is None:
+        return False
+    rgb = np.zeros((1, 1, 3), dtype=np.uint8)
+    mask = np.empty((1, 1), dtype=np.bool_)
+    kernels.key_pixels(rgb, 0, 0, 0, 0, mask, True)
+    kernels.key_pixels_lut(rgb, np.zeros(1 << 21, dtype=np.uint8), 0, 0, 0, mask, True)
+    kernels.composite_alpha(rgb, np.zeros((1, 1), dtype=np.uint8), 0, 0, 0, 0, 0, 1, 0)
+    return True
+
+
+def squared_threshold(tolerance):
+    """Return the largest integer squared distance whose square root is within tolerance."""
+    if tolerance < 0:
+        return -1
+    threshold = int(tolerance * tolerance)
+    while math.sqrt(threshold + 1) <= tolerance:
+        threshold += 1
+    while threshold >= 0 and math.sqrt(threshold) > tolerance:
+        threshold -= 1
+    return threshold
+
+
+def cv2_compatible(rgb):
+    """True if OpenCV can use the (rows, cols, 3) array in place: packed pixels, any row stride."""
+    return rgb.strides[2] == 1 and rgb.strides[1] == 3
+
+
+class ChromaKeyer:
+    """Common interface: set_key() once, then mask()/apply() per frame or frame region.
+
+    Scratch buffers grow to the largest shape seen and are used through
+    [:rows, :cols] views, so keying sub-rectangles of varying size (see
+    dirty_tiles) never reallocates.
+    """
+    name = None
+    available = True
+
+    def __init__(self):
+        self.key_color = None
+        self.tolerance = None
+        self.threshold = -1
+        self.capacity = (0, 0)
+        self._key_pixel = None
+        self._key_image = None
+
+    def set_key(self, key_color, tolerance):
+        """Set the key colour and Euclidean tolerance; cheap when nothing changed.
+
+        Returns True if the key changed.
+        """
+        key_color = tuple(int(c) for c in key_color[:3])
+        if key_color == self.key_color and tolerance == self.tolerance:
+            return False
+        self.key_color = key_color
+        self.tolerance = tolerance
+        self.threshold = squared_threshold(tolerance)
+        self._key_pixel = np.array(key_color, dtype=np.uint8)
+        if self._key_image is not None:
+            self._key_image[:] = self._key_pixel
+        self._key_changed()
+        return True
+
+    def _key_changed(self):
+        """Hook for backends that precompute per-key state."""
+
+    def _ensure_scratch(self, shape):
+        rows, cols = shape
+        if rows > self.capacity[0] or cols > self.capacity[1]:
+            self.capacity = (max(rows, self.capacity[0]), max(cols, self.capacity[1]))
+            self._key_image = None
+            self._allocate(*self.capacity)
+
+    def _allocate(self, rows, cols):
+        """Allocate scratch buffers for frames of up to (rows, cols)."""
+        raise NotImplementedError
+
+    def mask(self, rgb):
+        """Return a bool mask of keyed pixels; the array is reused on the next call."""
+        raise NotImplementedError
+
+    def apply(self, rgb):
+        """Overwrite keyed pixels of rgb in place with the key colour and return the mask."""
+        mask = self.mask(rgb)
+        self._fill(rgb, mask)
+        return mask
+
+    def _fill(self, rgb, mask):
+        """Write the key colour into rgb where mask is set."""
+        if cv2_compatible(rgb):
+            # cv2.copyTo with a mask is far cheaper than a broadcast np.copyto(where=...)
+            if self._key_image is None:
+                self._key_image = np.empty(self.capacity + (3,), dtype=np.uint8)
+                self._key_image[:] = self._key_pixel
+            rows, cols = rgb.shape[:2]
+            cv2.copyTo(self._key_image[:rows, :cols], mask.view(np.uint8), rgb)
+        else:
+            np.copyto(rgb, self._key_pixel, where=mask[..., None])
+
+
+class NumpyKeyer(ChromaKeyer):
+    """Integer squared distance with numpy ufuncs writing into int32 scratch."""
+    name = "numpy"
+
+    def _allocate(self, rows, cols):
+        self._distance = np.empty((rows, cols), dtype=np.int32)
+        self._term = np.empty((rows, cols), dtype=np.int32)
+        self._mask = np.empty((rows, cols), dtype=np.bool_)
+
+    def mask(self, rgb):
+        rows, cols = rgb.shape[:2]
+        self._ensure_scratch((rows, cols))
+        distance, term = self._distance[:rows, :cols], self._term[:rows, :cols]
+        for channel, key in enumerate(self.key_color):
+            target = distance if channel == 0 else term
+            np.subtract(rgb[..., channel], key, out=target, dtype=np.int32)
+            np.multiply(target, target, out=target)
+            if channel:
+                np.add(distance, term, out=distance)
+        mask = self._mask[:rows, :cols]
+        np.less_equal(distance, self.threshold, out=mask)
+        return mask
+
+
+_SQUARES_F32 = (np.arange(256, dtype=np.float32) ** 2).reshape(1, 256, 1)
+_CHANNEL_SUM = np.ones((1, 3), dtype=np.float32)
+
+
+class OpenCVKeyer(ChromaKeyer):
+    """cv2.absdiff + squared-difference LUT + cv2.inRange on the summed distance.
+
+    Squared distances are at most 3 * 255 ** 2, well inside float32's exact
+    integer range, so the comparison matches the integer backends exactly.
+    Expects packed (rows, cols, 3) pixels; other layouts are copied first.
+    """
+    name = "opencv"
+
+    def _key_changed(self):
+        self._key_scalar = tuple(float(c) for c in self.key_color) + (0.0,)
+
+    def _allocate(self, rows, cols):
+        self._diff = np.empty((rows, cols, 3), dtype=np.uint8)
+        self._squares = np.empty((rows, cols, 3), dtype=np.float32)
+        self._distance = np.empty((rows, cols), dtype=np.float32)
+        self._mask255 = np.empty((rows, cols), dtype=np.uint8)
+        self._mask01 = np.empty((rows, cols), dtype=np.uint8)
+
+    def mask(self, rgb):
+        if not cv2_compatible(rgb):
+            rgb = np.ascontiguousarray(rgb)
+        rows, cols = rgb.shape[:2]
+        self._ensure_scratch((rows, cols))
+        diff = self._diff[:rows, :cols]
+        squares = self._squares[:rows, :cols]
+        distance = self._distance[:rows, :cols]
+        mask255 = self._mask255[:rows, :cols]
+        mask01 = self._mask01[:rows, :cols]
+        cv2.absdiff(rgb, self._key_scalar, dst=diff)
+        cv2.LUT(diff, _SQUARES_F32, dst=squares)
+        cv2.transform(squares, _CHANNEL_SUM, dst=distance)
+        cv2.inRange(distance, 0.0, float(self.threshold), dst=mask255)
+        cv2.min(mask255, 1, dst=mask01)
+        return mask01.view(np.bool_)
+
+
+class NumbaKeyer(ChromaKeyer):
+    """Single fused pass over the frame, compiled with numba when it is installed."""
+    name = "numba"
+    available = NUMBA_INSTALLED
+
+    def __init__(self):
+        super().__init__()
+        self._kernel = numba_kernels().key_pixels
+
+    def _allocate(self, rows, cols):
+        self._mask = np.empty((rows, cols), dtype=np.bool_)
+
+    def _run(self, rgb, write):
+        rows, cols = rgb.shape[:2]
+        self._ensure_scratch((rows, cols))
+        mask = self._mask[:rows, :cols]
+        r, g, b = self.key_color
+        self._kernel(rgb, r, g, b, self.threshold, mask, write)
+        return mask
+
+    def mask(self, rgb):
+        return self._run(rgb, False)
+
+    def apply(self, rgb):
+        return self._run(rgb, True)
+
+
+KEY_METRICS = {
+    "rgb": "Euclidean RGB distance",
+    "ycbcr": "YCbCr chroma distance, luma weighted 1/4 (forgiving of shadows and compression)",
+    "hsv": "Hue within tolerance/2 degrees, for saturated keys",
+}
+
+_table_lock = threading.Lock()
+_table_cache = {}  # (key colour, tolerance, metric, packed) -> table; only the latest key is kept
+_converted_cube = {}  # metric -> every RGB colour converted to that space, (256, 65536, 3) uint8
+
+
+def _colour_cube(code):
+    """Every RGB colour converted with cv2 colour code, as a (256, 65536, 3) uint8 image indexed [r, g * 256 + b]."""
+    cube = np.empty((256, 256, 256, 3), dtype=np.uint8)
+    values = np.arange(256, dtype=np.uint8)
+    cube[..., 0] = values[:, None, None]
+    cube[..., 1] = values[None, :, None]
+    cube[..., 2] = values[None, None, :]
+    cube = cube.reshape(256, 65536, 3)
+    return cv2.cvtColor(cube, code, dst=cube)
+
+
+def _build_key_table(key_color, tolerance, metric):
+    table = np.empty((256, 256 * 256), dtype=np.bool_)
+    if metric == "rgb":
+        # Separable: the distance over the g/b plane is shared by every red value
+        threshold = squared_threshold(tolerance)
+        squares = (np.arange(256, dtype=np.int32) - np.array(key_color, dtype=np.int32)[:, None]) ** 2
+        plane = (squares[1][:, None] + squares[2][None, :]).ravel()
+        for r in range(256):
+            np.less_equal(plane, threshold - squares[0][r], out=table[r])
+        return table.reshape(256, 256, 256)
+    code = cv2.COLOR_RGB2YCrCb if metric == "ycbcr" else cv2.COLOR_RGB2HSV_FULL
+    key = cv2.cvtColor(np.array([[key_color]], dtype=np.uint8), code)[0, 0]
+    if metric == "ycbcr":
+        # 16 * (dCr^2 + dCb^2) + dY^2 <= 16 * tolerance^2, i.e. luma counts a quarter
+        weights = np.array([[1.0, 16.0, 16.0]], dtype=np.float32)
+        threshold = 16.0 * tolerance * tolerance
+    else:
+        # Full-range hue (256 steps per turn); grey and dark pixels have no reliable hue
+        circular = np.minimum(np.arange(256), 256 - np.arange(256)).astype(np.uint8)
+        max_hue = tolerance * 256 // 720
+    key_scalar = tuple(float(c) for c in key) + (0.0,)
+    if metric not in _converted_cube:
+        _converted_cube.clear()  # One metric at a time: the cube is 48 MB
+        _converted_cube[metric] = _colour_cube(code)
+    step = 16
+    for r_start in range(0, 256, step):
+        converted = _converted_cube[metric][r_start:r_start + step]
+        keyed = table[r_start:r_start + step]
+        if metric == "ycbcr":
+            squares = cv2.LUT(cv2.absdiff(converted, key_scalar), _SQUARES_F32)
+            np.less_equal(cv2.transform(squares, weights), threshold, out=keyed)
+        else:
+            hue, saturation, value = cv2.split(converted)
+            hue = cv2.LUT(cv2.absdiff(hue, float(key[0])), circular)
+            np.less_equal(hue, max_hue, out=keyed)
+            keyed &= saturation >= (int(key[1]) + 1) // 2
+            keyed &= value >= (int(key[2]) + 3) // 4
+    return table.reshape(256, 256, 256)
+
+
+def key_table(key_color, tolerance, metric="rgb", packed=False):
+    """Bool table indexed [r, g, b] of the colours keyed out, or its little-endian bit packing.
+
+    Building takes tens of milliseconds, so the table for the latest key is
+    cached and shared, e.g. by the stripes of a StripedKeyer.
+    """
+    if metric not in KEY_METRICS:
+        raise ValueError(f"Unknown key metric: {metric}")
+    cache_key = (tuple(key_color), tolerance, metric)
+    with _table_lock:
+        if _table_cache.get("key") != cache_key:
+            _table_cache.clear()
+            _table_cache["key"] = cache_key
+            _table_cache[False] = _build_key_table(key_color, tolerance, metric)
+        if packed and True not in _table_cache:
+            _table_cache[True] = np.packbits(_table_cache[False].ravel(), bitorder="little")
+        return _table_cache[packed]
+
+
+class LUTKeyer(ChromaKeyer):
+    """One lookup per pixel in a precomputed table of keyed colours, for any key metric.
+
+    With numba the table is bit-packed to 2 MB and read in a fused kernel;
+    otherwise pixels are packed into an index array and gathered from the
+    16 MB bool table with np.take.
+    """
+    name = "lut"
+
+    def __init__(self, metric="rgb"):
+        super().__init__()
+        if metric not in KEY_METRICS:
+            raise ValueError(f"Unknown key metric: {metric}")
+        self.metric = metric
+        self._table = None
+        kernels = numba_kernels()
+        self._kernel = kernels.key_pixels_lut if kernels else None
+
+    def _key_changed(self):
+        self._table = key_table(self.key_color, self.tolerance, self.metric, packed=self._kernel is not None)
+        if self._kernel is None:
+            self._table = self._table.ravel()
+
+    def _allocate(self, rows, cols):
+        self._mask = np.empty((rows, cols), dtype=np.bool_)
+        if self._kernel is None:
+            self._index = np.empty((rows, cols), dtype=np.intp)
+            self._term = np.empty((rows, cols), dtype=np.intp)
+
+    def _run(self, rgb, write):
+        rows, cols = rgb.shape[:2]
+        self._ensure_scratch((rows, cols))
+        mask = self._mask[:rows, :cols]
+        if self._kernel is not None:
+            r, g, b = self.key_color
+            self._kernel(rgb, self._table, r, g, b, mask, write)
+            return mask
+        index, term = self._index[:rows, :cols], self._term[:rows, :cols]
+        np.left_shift(rgb[..., 0], 16, out=index, dtype=np.intp)
+        np.left_shift(rgb[..., 1], 8, out=term, dtype=np.intp)
+        np.bitwise_or(index, term, out=index)
+        np.bitwise_or(index, rgb[..., 2], out=index)
+        np.take(self._table, index, out=mask, mode="clip")  # "clip" avoids buffering out
+        if write:
+            self._fill(rgb, mask)
+        return mask
+
+    def mask(self, rgb):
+        return self._run(rgb, False)
+
+    def apply(self, rgb):
+        return self._run(rgb, True)
+
+
+BACKENDS = {cls.name: cls for cls in (NumpyKeyer, OpenCVKeyer, NumbaKeyer, LUTKeyer)}
+
+
+def available_backends():
+    """Names of the backends usable in this environment."""
+    return [name for name, cls in BACKENDS.items() if cls.available]
+
+
+def create_keyer(backend="auto", metric="rgb"):
+    """Create a keyer by backend name; "auto" picks the fastest one available.
+
+    Metrics other than "rgb" are only offered by the LUT backend, which is
+    used for them whatever backend is asked for.
+    """
+    if metric != "rgb":
+        return LUTKeyer(metric)
+    if backend == "auto":
+        backend = "numba" if NumbaKeyer.available else "opencv"
+    cls = BACKENDS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown chroma key backend: {backend}")
+    if not cls.available:
+        raise ValueError(f"Chroma key backend not available: {backend}")
+    return cls()
@@ -0,0 +1,113 @@
+"""Remember per-clip facts that are slow to rediscover between runs.
+
+A small JSON file maps a hash of each clip's identity (path, mtime, size) to
+its detected key colour and tolerance, so reloading a clip with auto-chroma
+on skips detection, and to its exact frame count and loop duration, measured
+the first time it loops, which stand in for the container's estimate on
+later loads. Editing the clip changes its hash, so stale profiles are simply
+never looked up again.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from cache_paths import cache_root
+
+
+def clip_hash(path):
+    """Hash of the file identity of path, or None if it is missing."""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    identity = [os.path.abspath(path), info.st_mtime_ns, info.st_size]
+    return hashlib.sha1(json.dumps(identity).encode("utf-8")).hexdigest()
+
+
+class ClipProfiles:
+    """Clip hash -> profile dict, loaded on first use and saved after every update.
+
+    Saving happens on a background thread, so update() never waits on the
+    disk. Safe to use from the prefetch and detection threads.
+    """
+
+    def __init__(self, path=None, max_entries=500):
+        self.path = path or os.path.join(cache_root(), "profiles.json")
+        self.max_entries = max_entries
+        self.profiles = None
+        self.lock = threading.Lock()
+        self.dirty = threading.Event()  # Set when profiles has changes not yet on disk
+        self.saver = None
+        self.save_lock = threading.Lock()  # One writer of the file at a time
+
+    def _load(self):
+        if self.profiles is not None:
+            return
+        try:
+            with open(self.path) as f:
+                self.profiles = json.load(f)
+        except FileNotFoundError:
+            self.profiles = {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading clip profiles: {e}")
+            self.profiles = {}
+
+    def get(self, video_path):
+        """The stored profile of video_path, or None."""
+        name = clip_hash(video_path)
+        if name is None:
+            return None
+        with self.lock:
+            self._load()
+            profile = self.profiles.get(name)
+            return dict(profile) if profile else None
+
+    def chroma(self, video_path):
+        """Stored (key colour, tolerance) of video_path, or None."""
+        profile = self.get(video_path)
+        if not profile or "key_color" not in profile:
+            return None
+        return tuple(profile["key_color"]), profile["tolerance"]
+
+    def update(self, video_path, **fields):
+        """Merge fields into the profile of video_path and save; unchanged profiles aren't rewritten."""
+        name = clip_hash(video_path)
+        if name is None:
+            return
+        fields = {field: list(value) if isinstance(value, tuple) else value for field, value in fields.items()}
+        with self.lock:
+            self._load()
+            profile = self.profiles.pop(name, {})
+            changed = any(profile.get(field) != value for field, value in fields.items())
+            profile.update(fields)
+            self.profiles[name] = profile  # Most recently updated last
+            if not changed:
+                return
+            while len(self.profiles) > self.max_entries:
+                del self.profiles[next(iter(self.profiles))]
+            self.dirty.set()
+            if self.saver is None:
+                self.saver = threading.Thread(target=self._save_loop, daemon=True)
+                self.saver.start()
+
+    def _save_loop(self):
+        while True:
+            self.dirty.wait()
+            self.save()
+
+    def save(self):
+        """Write pending changes now; also called on exit so the last update isn't lost."""
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty.is_set():
+                    return
+                self.dirty.clear()
+                snapshot = json.dumps(self.profiles)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path + ".tmp", "w") as f:
+                    f.write(snapshot)
+                os.replace(self.path + ".tmp", self.path)
+            except OSError as e:
+                print(f"Error saving clip profiles: {e}")
@@ -0,0 +1,293 @@
+import collections
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class DecodeWorker:
+    """Decode a video into a fixed ring of RGB buffers, on its own thread or pumped with fill()."""
+
+    def __init__(self, video_path, queue_size=4, profiler=None, pool=None, threaded=True, loop=True):
+        self.video_path = video_path
+        self.loop = loop  # Rewind at the end of the clip; otherwise stop and set ended
+        self.profiler = profiler  # Optional FrameProfiler for the decode and convert stages
+        self.pool = pool  # Optional FramePool for striped colour conversion
+        self.capture = cv2.VideoCapture(video_path)
+        if not self.capture.isOpened():
+            raise Exception("Could not open video file")
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if 0 < fps <= 240 else 30.0  # Some containers report 0 or nonsense
+        self.frame_interval = 1.0 / self.fps
+        self.output_size = None  # (width, height) to downscale to right after decode; None is native
+        # One slot more than the queue depth: the consumer always holds the frame on screen
+        self.buffers = [
+            np.empty((self.height, self.width, 3), dtype=np.uint8)
+            for _ in range(queue_size + 1)
+        ]
+        # Presentation time in seconds of each slot, continuous across loops of the clip
+        self.timestamps = [0.0] * len(self.buffers)
+        # Frame index and time in seconds within the clip of each slot
+        self.positions = [0] * len(self.buffers)
+        self.clip_times = [0.0] * len(self.buffers)
+        frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_count_hint = frame_count if frame_count > 0 else None  # Container estimate
+        self.loop_frames = None  # Exact frame count and duration, known once the clip has wrapped
+        self.loop_duration = None
+        self._seek_time = None
+        # Producer state, carried between frames
+        self._bgr = None
+        self._small_bgr = None
+        self._loop_offset = 0.0
+        self._last_time = -self.frame_interval
+        self._position = 0
+        self._filling = False
+        self.free_slots = collections.deque(range(len(self.buffers)))
+        self.ready_slots = collections.deque()
+        self.current_slot = None
+        self.condition = threading.Condition()
+        self.running = True
+        self.ended = False  # Reached the end of a non-looping clip; queued frames can still be read
+        # Counters
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.underruns = 0
+        self.stall_time = 0.0
+        self._stall_start = None
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self.thread.start()
+
+    @property
+    def queue_depth(self):
+        """Number of decoded frames waiting to be presented."""
+        return len(self.ready_slots)
+
+    @property
+    def current_frame(self):
+        """The RGB frame last handed out by read(), or None."""
+        if self.current_slot is None:
+            return None
+        return self.buffers[self.current_slot]
+
+    @property
+    def current_position(self):
+        """(frame index, time within the clip) of the frame last handed out by read(), or None."""
+        if self.current_slot is None:
+            return None
+        return self.positions[self.current_slot], self.clip_times[self.current_slot]
+
+    @property
+    def current_time(self):
+        """Presentation time of the frame last handed out by read(), or None."""
+        if self.current_slot is None:
+            return None
+        return self.timestamps[self.current_slot]
+
+    def next_frame_time(self):
+        """Presentation time of the oldest queued frame, or None when the queue is empty."""
+        with self.condition:
+            if not self.ready_slots:
+                return None
+            return self.timestamps[self.ready_slots[0]]
+
+    @property
+    def nbytes(self):
+        """Memory held by the frame ring."""
+        return sum(buffer.nbytes for buffer in self.buffers)
+
+    def set_output_size(self, size):
+        """Deliver frames downscaled to size (width, height) with INTER_AREA, or native size for None.
+
+        Frames already queued keep their old size; buffers are reallocated
+        once per size change as slots come free.
+        """
+        if size is not None and tuple(size) == (self.width, self.height):
+            size = None
+        with self.condition:
+            self.output_size = tuple(size) if size is not None else None
+
+    def seek(self, frame_time, loop_duration=None):
+        """Drop queued frames and continue decoding from presentation time frame_time.
+
+        Needs the loop duration, measured or given (e.g. by a cache of an
+        earlier play of the clip); without it the decoder simply carries on.
+        """
+        with self.condition:
+            if self.loop_duration is None and loop_duration:
+                self.loop_duration = loop_duration
+            self._seek_time = frame_time
+            while self.ready_slots:
+                self.free_slots.append(self.ready_slots.popleft())
+            self.condition.notify_all()
+
+    def peek_frame(self, timeout=None):
+        """Wait for the oldest queued frame and return it without consuming it, or None on timeout."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.ready_slots or not self.running or self.ended, timeout)
+            if not self.ready_slots:
+                return None
+            return self.buffers[self.ready_slots[0]]
+
+    def _decode_loop(self):
+        """Producer thread: decode and convert frames until released."""
+        while self.running:
+            with self.condition:
+                while self.running and not self.free_slots:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                slot = self.free_slots.popleft()
+                seek_time, self._seek_time = self._seek_time, None
+            if not self._decode_into(slot, seek_time):
+                break
+        self.capture.release()
+
+    def fill(self):
+        """Decode into every free slot without blocking and return the number of frames decoded.
+
+        For workers created with threaded=False, whose frames are pumped by a
+        shared pool instead of a thread per clip. Calls must not overlap.
+        """
+        decoded = 0
+        with self.condition:
+            if self._filling:
+                return 0
+            self._filling = True
+        try:
+            while True:
+                with self.condition:
+                    if not self.running or not self.free_slots:
+                        break
+                    slot = self.free_slots.popleft()
+                    seek_time, self._seek_time = self._seek_time, None
+                if not self._decode_into(slot, seek_time):
+                    self.running = False
+                    break
+                decoded += 1
+        finally:
+            with self.condition:
+                self._filling = False
+                self.condition.notify_all()
+        return decoded
+
+    def _decode_into(self, slot, seek_time):
+        """Decode the next frame into slot, rewinding at the end of the clip; False if the clip is unreadable."""
+        if seek_time is not None and self.loop_duration:
+            self._loop_offset = (seek_time // self.loop_duration) * self.loop_duration
+            self.capture.set(cv2.CAP_PROP_POS_MSEC, (seek_time - self._loop_offset) * 1000.0)
+            self._position = max(0, int(self.capture.get(cv2.CAP_PROP_POS_FRAMES)))
+            self._last_time = seek_time - self.frame_interval
+        start = time.perf_counter()
+        ret, self._bgr = self.capture.read(self._bgr)
+        if not ret and not self.loop:
+            with self.condition:
+                self.free_slots.appendleft(slot)
+                self.ended = True
+                self.condition.notify_all()
+            return False
+        if not ret:
+            # Loop the clip; the seek happens here rather than on the render thread
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            if self.loop_duration is None and self._position:
+                self.loop_frames = self._position
+                self.loop_duration = self._last_time + self.frame_interval - self._loop_offset
+            self._loop_offset = self._last_time + self.frame_interval
+            self._position = 0
+            ret, self._bgr = self.capture.read(self._bgr)
+        if not ret:
+            print(f"Decoder stopped: could not read {self.video_path}")
+            with self.condition:
+                self.free_slots.appendleft(slot)
+            return False
+        frame_time = self._loop_offset + self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if not frame_time > self._last_time:  # Missing or non-monotonic timestamps
+            frame_time = self._last_time + self.frame_interval
+        self._last_time = frame_time
+        frame_position = self._position
+        self._position += 1
+        if self.profiler:
+            start = self.profiler.record("decode", start)
+        output_size = self.output_size
+        shape = (output_size[1], output_size[0], 3) if output_size else (self.height, self.width, 3)
+        if self.buffers[slot].shape != shape:
+            self.buffers[slot] = np.empty(shape, dtype=np.uint8)
+        source = self._bgr
+        if output_size:
+            # Downscale before conversion so everything downstream runs at output size
+            if self._small_bgr is None or self._small_bgr.shape != shape:
+                self._small_bgr = np.empty(shape, dtype=np.uint8)
+            source = cv2.resize(self._bgr, output_size, dst=self._small_bgr, interpolation=cv2.INTER_AREA)
+            if self.profiler:
+                start = self.profiler.record("downscale", start)
+        if self.pool:
+            self.pool.convert(source, cv2.COLOR_BGR2RGB, self.buffers[slot])
+        else:
+            cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self.buffers[slot])
+        if self.profiler:
+            self.profiler.record("convert", start)
+        with self.condition:
+            self.timestamps[slot] = frame_time
+            self.positions[slot] = frame_position
+            self.clip_times[slot] = frame_time - self._loop_offset
+            self.ready_slots.append(slot)
+            self.frames_decoded += 1
+            self.condition.notify_all()
+        return True
+
+    def read(self, newest=False, until=None):
+        """Take the next decoded frame, mirroring VideoCapture.read().
+
+        Returns (False, None) when no frame is ready yet. With newest=True any
+        older queued frames are discarded and counted as dropped. With until
+        (a presentation time) only frames due by then are taken, and all but
+        the newest of those are dropped as late. The returned array stays
+        valid until the next call.
+        """
+        with self.condition:
+            now = time.perf_counter()
+            if not self.ready_slots:
+                if self._stall_start is None:
+                    self._stall_start = now
+                    self.underruns += 1
+                return False, None
+            if self._stall_start is not None:
+                self.stall_time += now - self._stall_start
+                self._stall_start = None
+            if until is not None and self.timestamps[self.ready_slots[0]] > until:
+                return False, None  # Next frame is not due yet
+            while len(self.ready_slots) > 1 and (
+                    newest or (until is not None and self.timestamps[self.ready_slots[1]] <= until)):
+                self.free_slots.append(self.ready_slots.popleft())
+                self.frames_dropped += 1
+            if self.current_slot is not None:
+                self.free_slots.append(self.current_slot)
+            self.current_slot = self.ready_slots.popleft()
+            self.condition.notify()
+        return True, self.buffers[self.current_slot]
+
+    def stats(self):
+        """Snapshot of the decoder counters."""
+        return {
+            "queue_depth": self.queue_depth,
+            "frames_decoded": self.frames_decoded,
+            "frames_dropped": self.frames_dropped,
+            "underruns": self.underruns,
+            "stall_time": self.stall_time,
+        }
+
+    def release(self):
+        """Stop the decode thread and release the capture."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+            if self.thread is None:
+                self.condition.wait_for(lambda: not self._filling, 2.0)
+        if self.thread is None:
+            self.capture.release()
+        elif self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
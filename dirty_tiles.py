@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+
+
+class TileTracker:
+    """Find the tiles of a frame that changed since they were last keyed.
+
+    Each tile is compared against a reference copy of what was last keyed
+    for it, not just the previous frame, so slow drifts below the threshold
+    still trigger a re-key once they add up.
+    """
+
+    def __init__(self, tile_size=64, threshold=8):
+        self.tile_size = tile_size
+        self.threshold = threshold  # Largest per-channel difference still treated as unchanged
+        self.shape = None
+        self.valid = False
+        self.tiles_total = 0
+        self.tiles_skipped = 0
+
+    @property
+    def skip_ratio(self):
+        """Fraction of tiles skipped since the counters were last reset."""
+        return self.tiles_skipped / self.tiles_total if self.tiles_total else 0.0
+
+    def reset_stats(self):
+        self.tiles_total = 0
+        self.tiles_skipped = 0
+
+    def invalidate(self):
+        """Treat every tile as changed on the next update (key or size change)."""
+        self.valid = False
+
+    def _allocate(self, rows, cols):
+        size = self.tile_size
+        tiles_y = -(-rows // size)
+        tiles_x = -(-cols // size)
+        # Padded to whole tiles; the padding of diff stays zero
+        self.reference = np.zeros((tiles_y * size, tiles_x * size, 3), dtype=np.uint8)
+        self.diff = np.zeros_like(self.reference)
+        self.tile_max = np.empty((tiles_y, tiles_x), dtype=np.uint8)
+        self.changed = np.empty((tiles_y, tiles_x), dtype=np.bool_)
+
+    def update(self, frame):
+        """Compare frame with the reference and return the changed (x, y, w, h) rects."""
+        rows, cols = frame.shape[:2]
+        if (rows, cols) != self.shape:
+            self.shape = (rows, cols)
+            self._allocate(rows, cols)
+            self.valid = False
+        size = self.tile_size
+        tiles_y, tiles_x = self.changed.shape
+        if self.valid:
+            cv2.absdiff(frame, self.reference[:rows, :cols], dst=self.diff[:rows, :cols])
+            np.max(self.diff.reshape(tiles_y, size, tiles_x, size * 3), axis=(1, 3), out=self.tile_max)
+            np.greater(self.tile_max, self.threshold, out=self.changed)
+        else:
+            self.changed[:] = True
+            self.valid = True
+        rects = self._rects(rows, cols)
+        for x, y, w, h in rects:
+            np.copyto(self.reference[y:y + h, x:x + w], frame[y:y + h, x:x + w])
+        changed = int(np.count_nonzero(self.changed))
+        self.tiles_total += self.changed.size
+        self.tiles_skipped += self.changed.size - changed
+        return rects
+
+    def _rects(self, rows, cols):
+        """Merge horizontal runs of changed tiles into rects clipped to the frame."""
+        size = self.tile_size
+        rects = []
+        for tile_y in np.flatnonzero(self.changed.any(axis=1)):
+            row = np.concatenate(([False], self.changed[tile_y], [False]))
+            edges = np.flatnonzero(row[1:] != row[:-1])
+            y = int(tile_y) * size
+            h = min(y + size, rows) - y
+            for start, stop in zip(edges[::2], edges[1::2]):
+                x = int(start) * size
+                rects.append((x, y, min(int(stop) * size, cols) - x, h))
+        return rects
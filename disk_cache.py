@@ -0,0 +1,224 @@
+"""Persistent on-disk cache of keyed, window-sized frames for clips too big for RAM.
+
+Each entry is a raw file of consecutive RGB frames, memory-mapped for
+playback, plus a small JSON header holding the frame times. Entries are named
+by a hash of the source file (path, mtime, size) and everything the keyed
+frames depend on, so editing the clip or changing the key simply misses.
+The header is written last: an entry without one is incomplete and ignored.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from cache_paths import cache_root
+from chroma_key import create_keyer
+from frame_render import render_frame
+from keyed_frame import KeyedFrame
+from loop_cache import CachedLoop
+
+FORMAT_VERSION = 1
+
+
+def default_directory():
+    return os.path.join(cache_root(), "frames")
+
+
+class MappedClip(CachedLoop):
+    """A complete cached loop whose frames are read straight from a memory-mapped file."""
+
+    def __init__(self, path, key, header, frames_path):
+        super().__init__(path, key)
+        self.frame_count = header["frame_count"]
+        self.duration = header["duration"]
+        shape = (self.frame_count, header["height"], header["width"], 3)
+        self._images = np.memmap(frames_path, dtype=np.uint8, mode="r", shape=shape)
+        self._times = header["times"]
+        self.nbytes = self._images.nbytes
+
+    @property
+    def complete(self):
+        return True
+
+    def _index(self):
+        pass
+
+
+class DiskFrameCache:
+    """Look up cached clips and build missing ones on a background thread.
+
+    The directory is kept under budget bytes by deleting the least recently
+    used entries after each build.
+    """
+
+    def __init__(self, directory=None, budget=4 * 1024 * 1024 * 1024, backend="auto"):
+        self.directory = directory or default_directory()
+        self.budget = budget
+        self.backend = backend  # Chroma key backend used by the builder
+        self.requests = queue.Queue()
+        self.building = None  # Entry name being built
+        self.builds = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def entry_name(self, path, key):
+        """Hash of the source file identity and the keyed-frame settings, or None if path is missing."""
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        identity = [FORMAT_VERSION, os.path.abspath(path), info.st_mtime_ns, info.st_size, repr(key)]
+        return hashlib.sha1(json.dumps(identity).encode("utf-8")).hexdigest()
+
+    def _paths(self, name):
+        base = os.path.join(self.directory, name)
+        return base + ".json", base + ".frames"
+
+    def open(self, path, key):
+        """Map the cached frames of path for key, or None on a miss."""
+        name = self.entry_name(path, key)
+        if name is None:
+            return None
+        header_path, frames_path = self._paths(name)
+        try:
+            with open(header_path) as f:
+                header = json.load(f)
+            clip = MappedClip(path, key, header, frames_path)
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(header_path):
+                print(f"Error opening frame cache for {os.path.basename(path)}: {e}")
+            return None
+        os.utime(header_path)  # Mark as recently used
+        return clip
+
+    def request(self, path, key, decode_size):
+        """Build the entry for path and key in the background; newer requests supersede older ones."""
+        name = self.entry_name(path, key)
+        if name is None or name == self.building or os.path.exists(self._paths(name)[0]):
+            return
+        self.requests.put((name, path, key, decode_size))
+
+    def _run(self):
+        while self.running:
+            job = self.requests.get()
+            if job is None:
+                break
+            while not self.requests.empty():  # Only the newest request is worth building
+                job = self.requests.get()
+                if job is None:
+                    return
+            self.building = job[0]
+            try:
+                self._build(*job)
+            except Exception as e:
+                print(f"Error building frame cache for {os.path.basename(job[1])}: {e}")
+            finally:
+                self.building = None
+
+    def _build(self, name, path, key, decode_size):
+        """Decode, scale and key the whole clip into a new entry, exactly as playback renders it.
+
+        key is the overlay's loop key: ((key colour, tolerance, metric, feather), width, height, scale policy).
+        """
+        (key_color, tolerance, metric, feather), width, height, scale_policy = key
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise Exception("Could not open video file")
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frame_interval = 1.0 / (fps if 0 < fps <= 240 else 30.0)
+        frame_bytes = width * height * 3
+        expected = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if expected > 0 and expected * frame_bytes > self.budget:
+            capture.release()
+            print(f"Frame cache skipped for {os.path.basename(path)}: larger than the cache budget")
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        header_path, frames_path = self._paths(name)
+        temp_path = frames_path + ".tmp"
+        keyer = create_keyer(self.backend, metric)
+        keyed_frame = KeyedFrame(feather) if feather else None
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        scratch = None
+        times = []
+        last_time = -frame_interval
+        start = time.perf_counter()
+        try:
+            with open(temp_path, "wb") as f:
+                while True:
+                    ret, bgr = capture.read()
+                    if not ret:
+                        break
+                    frame_time = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    if not frame_time > last_time:  # Same rule as the decode worker
+                        frame_time = last_time + frame_interval
+                    last_time = frame_time
+                    if decode_size:
+                        bgr = cv2.resize(bgr, decode_size, interpolation=cv2.INTER_AREA)
+                    rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+                    scratch = render_frame(rgb, out, keyer, key_color, tolerance, scale_policy, scratch,
+                                           keyed_frame=keyed_frame)
+                    f.write(out.data)
+                    times.append(frame_time)
+                    if (len(times) + 1) * frame_bytes > self.budget:
+                        raise Exception("larger than the cache budget")
+                    if not self.running or not self.requests.empty():
+                        raise Exception("superseded by a newer request")
+        except Exception as e:
+            capture.release()
+            os.remove(temp_path)
+            print(f"Frame cache build stopped for {os.path.basename(path)}: {e}")
+            return
+        capture.release()
+        if not times:
+            os.remove(temp_path)
+            return
+        os.replace(temp_path, frames_path)
+        header = {
+            "version": FORMAT_VERSION,
+            "source": os.path.abspath(path),
+            "width": width,
+            "height": height,
+            "frame_count": len(times),
+            "duration": last_time + frame_interval,  # Loop length, as the decode worker measures it
+            "times": times,
+        }
+        with open(header_path + ".tmp", "w") as f:
+            json.dump(header, f)
+        os.replace(header_path + ".tmp", header_path)
+        self.builds += 1
+        print(f"Frame cache built for {os.path.basename(path)}: {len(times)} frames "
+              f"in {time.perf_counter() - start:.1f}s")
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the directory is within budget."""
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".json"):
+                header_path = os.path.join(self.directory, filename)
+                frames_path = header_path[:-len(".json")] + ".frames"
+                size = os.path.getsize(frames_path) if os.path.exists(frames_path) else 0
+                entries.append((os.path.getmtime(header_path), size, header_path, frames_path))
+        total = sum(entry[1] for entry in entries)
+        for _, size, header_path, frames_path in sorted(entries):
+            if total <= self.budget:
+                break
+            try:
+                os.remove(header_path)
+                os.remove(frames_path)
+            except OSError:
+                continue  # Still mapped (Windows) or already gone
+            total -= size
+
+    def stats(self):
+        return {"building": self.building is not None, "builds": self.builds}
+
+    def release(self):
+        self.running = False
+        self.requests.put(None)
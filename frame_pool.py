@@ -0,0 +1,131 @@
+"""Split per-frame work into horizontal stripes run on a persistent thread pool.
+
+numpy, OpenCV and the numba kernels release the GIL on large arrays, so
+stripes of one frame genuinely run in parallel. Every stripe writes into its
+own rows of preallocated output buffers, which keeps results identical to a
+single pass over the whole frame.
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from chroma_key import create_keyer
+
+
+def default_workers():
+    """Worker count used when none is configured: the CPU count, capped at 4."""
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+class FramePool:
+    """Persistent worker threads plus the stripe layout for a frame."""
+
+    def __init__(self, workers=None, min_stripe_rows=64):
+        self.workers = workers or default_workers()
+        self.min_stripe_rows = min_stripe_rows  # Smaller stripes cost more in hand-off than they save
+        self.executor = None
+        if self.workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="frame-pool")
+
+    def stripes(self, rows):
+        """Split rows into at most one (start, stop) range per worker."""
+        count = max(1, min(self.workers, rows // self.min_stripe_rows))
+        bounds = [rows * i // count for i in range(count + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def run(self, function, rows):
+        """Call function(index, start, stop) for each stripe of rows and wait for all of them."""
+        stripes = self.stripes(rows)
+        executor = self.executor
+        if len(stripes) == 1 or executor is None:
+            for index, (start, stop) in enumerate(stripes):
+                function(index, start, stop)
+            return
+        futures = []
+        for index, (start, stop) in enumerate(stripes):
+            try:
+                futures.append(executor.submit(function, index, start, stop))
+            except RuntimeError:  # Pool released from another thread
+                function(index, start, stop)
+        for future in futures:
+            future.result()  # Re-raises worker exceptions
+
+    def submit(self, function, *args):
+        """Run function(*args) on a worker and return its Future; inline when the pool has one worker."""
+        executor = self.executor
+        if executor is not None:
+            try:
+                return executor.submit(function, *args)
+            except RuntimeError:  # Pool released from another thread
+                pass
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def convert(self, src, code, dst):
+        """Striped cv2.cvtColor for same-sized src and dst."""
+        self.run(lambda _, start, stop: cv2.cvtColor(src[start:stop], code, dst=dst[start:stop]),
+                 src.shape[0])
+        return dst
+
+    def release(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+class StripedKeyer:
+    """A ChromaKeyer front end that keys each stripe with its own backend instance.
+
+    Each stripe gets a separate keyer so scratch buffers are never shared
+    between threads; masks are gathered into one frame-sized buffer.
+    """
+
+    def __init__(self, backend="auto", pool=None, metric="rgb"):
+        self.pool = pool or FramePool()
+        self.keyers = [create_keyer(backend, metric) for _ in range(self.pool.workers)]
+        self.name = f"{self.keyers[0].name} x{self.pool.workers}"
+        self._mask = np.empty((0, 0), dtype=np.bool_)
+
+    @property
+    def key_color(self):
+        return self.keyers[0].key_color
+
+    @property
+    def tolerance(self):
+        return self.keyers[0].tolerance
+
+    def set_key(self, key_color, tolerance):
+        """Set the key on every stripe keyer; returns True if the key changed."""
+        changed = False
+        for keyer in self.keyers:
+            changed = keyer.set_key(key_color, tolerance) or changed
+        return changed
+
+    def _run(self, rgb, write):
+        rows, cols = rgb.shape[:2]
+        if self._mask.shape[0] < rows or self._mask.shape[1] < cols:
+            self._mask = np.empty((max(rows, self._mask.shape[0]), max(cols, self._mask.shape[1])),
+                                  dtype=np.bool_)
+        mask = self._mask[:rows, :cols]
+
+        def key_stripe(index, start, stop):
+            keyer = self.keyers[index]
+            stripe = rgb[start:stop]
+            mask[start:stop] = keyer.apply(stripe) if write else keyer.mask(stripe)
+
+        self.pool.run(key_stripe, rows)
+        return mask
+
+    def mask(self, rgb):
+        """Return a bool mask of keyed pixels; the array is reused on the next call."""
+        return self._run(rgb, False)
+
+    def apply(self, rgb):
+        """Overwrite keyed pixels of rgb in place with the key colour and return the mask."""
+        return self._run(rgb, True)
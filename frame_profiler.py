@@ -0,0 +1,89 @@
+import csv
+import json
+import time
+
+import numpy as np
+
+# Pipeline stages in the order a frame passes through them
+STAGES = ("decode", "downscale", "convert", "upload", "scale", "diff", "key", "blit", "flip")
+
+
+class FrameProfiler:
+    """Rolling per-stage timings with p50/p95/p99 summaries.
+
+    Each stage keeps its last `window` samples in a preallocated ring, so
+    recording a sample costs one perf_counter() call and an array store.
+    Stages are written by one thread each, so no lock is taken: the decode
+    stages by the playing clip's decode worker (prefetched clips decode
+    without a profiler until they play), the others by the render thread.
+    The rings for every pipeline stage exist from the start, so recording
+    never resizes the dicts the render thread reads in summary().
+    """
+
+    def __init__(self, window=600):
+        self.window = window
+        self.samples = {stage: np.zeros(window, dtype=np.float64) for stage in STAGES}
+        self.counts = dict.fromkeys(STAGES, 0)
+        self.started = time.perf_counter()
+
+    def record(self, stage, start):
+        """Record the time since start for stage and return now, so stages can be chained."""
+        now = time.perf_counter()
+        ring = self.samples.get(stage)
+        if ring is None:
+            ring = self.samples[stage] = np.zeros(self.window, dtype=np.float64)
+            self.counts[stage] = 0
+        count = self.counts[stage]
+        ring[count % self.window] = now - start
+        self.counts[stage] = count + 1
+        return now
+
+    def summary(self):
+        """Per-stage count, mean, p50, p95, p99 and max over the rolling window, in milliseconds."""
+        result = {}
+        stages = list(self.samples)  # Pipeline stages first; any others were added in recording order
+        for stage in stages:
+            count = self.counts[stage]
+            window = self.samples[stage][:min(count, self.window)] * 1000.0
+            if not window.size:
+                continue
+            p50, p95, p99 = np.percentile(window, (50, 95, 99))
+            result[stage] = {
+                "count": count,
+                "mean": float(window.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(window.max()),
+            }
+        return result
+
+    def frame_rate(self, stage="flip"):
+        """Average rate of a stage since the profiler started (frames per second for flip)."""
+        elapsed = time.perf_counter() - self.started
+        return self.counts.get(stage, 0) / elapsed if elapsed > 0 else 0.0
+
+    def hud_lines(self):
+        """Text lines for the on-screen HUD."""
+        lines = [f"{self.frame_rate():5.1f} fps    p50 / p95 / p99 ms"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<8}{stats['p50']:6.2f} {stats['p95']:6.2f} {stats['p99']:6.2f}")
+        return lines
+
+    def dump(self, path, extra=None):
+        """Write the summary to path as CSV (for a .csv path) or JSON."""
+        summary = self.summary()
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+                for stage, stats in summary.items():
+                    writer.writerow([stage, stats["count"], stats["mean"], stats["p50"],
+                                     stats["p95"], stats["p99"], stats["max"]])
+        else:
+            data = {"stages": summary, "fps": self.frame_rate()}
+            if extra:
+                data.update(extra)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        print(f"Frame profile written to {path}")
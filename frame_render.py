@@ -0,0 +1,66 @@
+"""Turn decoded RGB frames into the keyed, window-sized frames the overlay shows.
+
+Shared by the live pipeline and the background disk cache builder so both
+produce the same bytes for the same settings.
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+def decode_size(scale_policy, size, native_size):
+    """Size (width, height) the decoder should downscale to for a window of size, or None for native."""
+    if scale_policy == "scale_then_key" and size[0] <= native_size[0] and size[1] <= native_size[1]:
+        if tuple(size) != tuple(native_size):
+            return tuple(size)
+    return None
+
+
+def _no_profiler(stage, start):
+    return time.perf_counter()
+
+
+def render_frame(frame_rgb, out, keyer, key_color, tolerance, scale_policy, scratch=None, profiler=None,
+                 keyed_frame=None):
+    """Scale and key frame_rgb into out (window size) without allocating.
+
+    Upscales and key_then_scale key at source size in scratch first, then
+    scale with nearest neighbour. With a KeyedFrame the alpha plane is built
+    (and feathered) at window size and the keyed output composited from it.
+    Returns the scratch buffer for the next call.
+    """
+    record = profiler.record if profiler else _no_profiler
+    start = time.perf_counter()
+    rows, cols = frame_rgb.shape[:2]
+    height, width = out.shape[:2]
+    upscaling = rows < height or cols < width
+    if (scale_policy == "key_then_scale" or upscaling) and (rows, cols) != (height, width):
+        # Key at source size, then nearest-neighbour scale so keyed pixels keep the exact key colour.
+        # Nearest-neighbour scaling commutes with per-pixel keying, so upscales always key first.
+        if scratch is None or scratch.shape != frame_rgb.shape:
+            scratch = np.empty_like(frame_rgb)
+        np.copyto(scratch, frame_rgb)
+        start = record("upload", start)
+        keyer.set_key(key_color, tolerance)
+        keyer.apply(scratch)
+        start = record("key", start)
+        cv2.resize(scratch, (width, height), dst=out, interpolation=cv2.INTER_NEAREST)
+        start = record("scale", start)
+        if keyed_frame is not None:
+            keyed_frame.apply_keyed(out, key_color)
+            record("key", start)
+        return scratch
+    if (rows, cols) == (height, width):
+        np.copyto(out, frame_rgb)
+        start = record("upload", start)
+    else:
+        cv2.resize(frame_rgb, (width, height), dst=out, interpolation=cv2.INTER_NEAREST)
+        start = record("scale", start)
+    keyer.set_key(key_color, tolerance)
+    if keyed_frame is not None:
+        keyed_frame.apply(out, keyer)
+    else:
+        keyer.apply(out)
+    record("key", start)
+    return scratch
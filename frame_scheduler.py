@@ -0,0 +1,114 @@
+import time
+
+
+class PresentationClock:
+    """Media clock deciding when decoded frames are due, slaved to the VLC audio clock while audio plays."""
+
+    def __init__(self, resync_threshold=0.08, correction=0.1):
+        self.resync_threshold = resync_threshold  # Jump straight to the audio time beyond this drift (s)
+        self.correction = correction  # Fraction of smaller drifts corrected per audio sample
+        self.anchor = None  # perf_counter() value at media time 0
+        self.paused_at = None
+        self.last_audio_ms = None
+        # Statistics
+        self.drift = 0.0
+        self.max_drift = 0.0
+        self.drift_samples = 0
+        self.drift_total = 0.0
+        self.resyncs = 0
+        self.frames_presented = 0
+        self.lateness_total = 0.0
+        self.max_lateness = 0.0
+
+    @property
+    def started(self):
+        return self.anchor is not None
+
+    def start(self, media_time=0.0):
+        """Start (or restart) the clock at the given media time."""
+        self.anchor = time.perf_counter() - media_time
+        self.paused_at = None
+        self.last_audio_ms = None
+
+    def reset(self):
+        """Stop the clock; it restarts at the first frame of the next clip."""
+        self.anchor = None
+        self.paused_at = None
+        self.last_audio_ms = None
+
+    def pause(self):
+        if self.started and self.paused_at is None:
+            self.paused_at = self.time()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.start(self.paused_at)
+
+    def time(self):
+        """Current media time in seconds, or None before the clock is started."""
+        if self.anchor is None:
+            return None
+        if self.paused_at is not None:
+            return self.paused_at
+        return time.perf_counter() - self.anchor
+
+    def clip_time(self, loop_duration=None):
+        """Current time within the clip: media time keeps counting across loops, the clip does not."""
+        media_time = self.time()
+        if media_time is None or not loop_duration:
+            return media_time
+        return media_time % loop_duration
+
+    def time_until(self, media_time):
+        """Seconds of wall time until media_time is due."""
+        return media_time - self.time()
+
+    def sync_audio(self, player, loop_duration=None):
+        """Pull the clock towards the audio player's position whenever it reports a new one.
+
+        VLC reports time within the clip, so once the loop duration is known
+        the drift is measured against the clock's position within the loop.
+        """
+        if player is None or not self.started or self.paused_at is not None:
+            return
+        try:
+            if not player.is_playing():
+                return
+            audio_ms = player.get_time()
+        except Exception:
+            return
+        if audio_ms < 0 or audio_ms == self.last_audio_ms:
+            return
+        self.last_audio_ms = audio_ms
+        drift = audio_ms / 1000.0 - self.clip_time(loop_duration)
+        if loop_duration:
+            # Either side of the loop point, the nearer wrap is the real drift
+            drift = (drift + loop_duration / 2) % loop_duration - loop_duration / 2
+        self.drift = drift
+        self.max_drift = max(self.max_drift, abs(drift))
+        self.drift_total += abs(drift)
+        self.drift_samples += 1
+        if abs(drift) > self.resync_threshold:
+            self.anchor -= drift
+            self.resyncs += 1
+        else:
+            self.anchor -= drift * self.correction
+
+    def record_presentation(self, media_time):
+        """Note that the frame due at media_time went on screen now."""
+        lateness = max(0.0, self.time() - media_time)
+        self.frames_presented += 1
+        self.lateness_total += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+
+    def stats(self):
+        """Snapshot of drift and presentation statistics (seconds)."""
+        return {
+            "frames_presented": self.frames_presented,
+            "drift": self.drift,
+            "mean_drift": self.drift_total / self.drift_samples if self.drift_samples else 0.0,
+            "max_drift": self.max_drift,
+            "resyncs": self.resyncs,
+            "mean_lateness": self.lateness_total / self.frames_presented if self.frames_presented else 0.0,
+            "max_lateness": self.max_lateness,
+        }
@@ -0,0 +1,143 @@
+"""Keyed frames as RGB plus a one-byte alpha plane, with optional edge feathering.
+
+The keyer only decides which pixels are keyed; that decision is kept as a
+uint8 alpha plane (0 keyed, 255 opaque) next to the RGB frame. Feathering
+and spill suppression work on the alpha plane alone, at a fraction of the
+frame size, and composite() then writes the colour-keyed RGB the layered
+window shows in a single pass.
+
+The layered window can only make pixels fully see-through, so there the
+soft alpha is used for spill suppression: pixels in the feathered band just
+inside the subject's edge lose the key colour's tint in proportion to their
+transparency. Sinks with an alpha channel (see render_sink) get the soft
+alpha itself.
+"""
+import cv2
+import numpy as np
+
+from chroma_key import cv2_compatible, numba_kernels
+
+FEATHER_STEPS = (0, 2, 4, 8)  # Feather radii offered in the overlay, in window pixels
+
+
+def spill_channels(key_color):
+    """(r, g, b) flags of the channels that carry the key colour, or None if it has no tint to suppress.
+
+    A channel counts when it is at least half the key's strongest channel,
+    so green keys suppress green and magenta keys red and blue.
+    """
+    strongest = max(key_color)
+    high = tuple(int(strongest > 0 and 2 * c >= strongest) for c in key_color)
+    if all(high) or not any(high):
+        return None  # Grey, white or black keys
+    return high
+
+
+class KeyedFrame:
+    """An RGB frame and its alpha plane; apply() keys, feathers and composites it in place.
+
+    Buffers are reused for as long as the frame size stays the same.
+    """
+
+    def __init__(self, feather=0, spill=True, cutoff=0, downscale=4):
+        self.feather = feather  # Box blur radius in frame pixels; 0 keeps the hard keyer edge
+        self.spill = spill  # Remove the key colour's tint from feathered edge pixels
+        self.cutoff = cutoff  # Alpha at or below this is keyed out in the colour-keyed output
+        self.downscale = downscale  # Largest factor the mask is shrunk by before blurring
+        self.rgb = None
+        self.alpha = None
+        self._small = None
+        self._blurred = None
+        self._soft = None
+        self._key_image = None
+        self.use_numba = True  # Spill suppression in one numba pass; numba is imported on first use
+
+    def _ensure(self, rgb):
+        if self.alpha is None or self.alpha.shape != rgb.shape[:2]:
+            self.alpha = np.empty(rgb.shape[:2], dtype=np.uint8)
+            self._soft = None
+            self._key_image = None
+        self.rgb = rgb
+
+    def set_mask(self, rgb, mask):
+        """Take the keyer's bool mask of rgb as the alpha plane."""
+        self._ensure(rgb)
+        cv2.threshold(mask.view(np.uint8), 0, 255, cv2.THRESH_BINARY_INV, dst=self.alpha)
+
+    def set_key_color(self, rgb, key_color):
+        """Derive the alpha plane of rgb from pixels that are exactly key_color (already keyed frames)."""
+        self._ensure(rgb)
+        key = tuple(int(c) for c in key_color)
+        cv2.inRange(rgb, key, key, dst=self.alpha)
+        cv2.bitwise_not(self.alpha, dst=self.alpha)
+
+    def feather_edges(self):
+        """Soften the alpha plane inwards from keyed edges by about feather pixels.
+
+        The mask is scaled down, box blurred in uint8 and scaled back up; the
+        minimum with the hard mask keeps every keyed pixel keyed. Bilinear
+        shrinking samples less than INTER_AREA but costs a sixth as much, and
+        the blur hides the difference.
+        """
+        if self.feather <= 0:
+            return
+        rows, cols = self.alpha.shape
+        factor = max(1, min(self.downscale, self.feather))
+        radius = max(1, self.feather // factor)
+        small_size = (max(1, -(-cols // factor)), max(1, -(-rows // factor)))
+        if self._small is None or self._small.shape != small_size[::-1]:
+            self._small = np.empty(small_size[::-1], dtype=np.uint8)
+            self._blurred = np.empty_like(self._small)
+        if self._soft is None:
+            self._soft = np.empty_like(self.alpha)
+        cv2.resize(self.alpha, small_size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        cv2.blur(self._small, (2 * radius + 1, 2 * radius + 1), dst=self._blurred,
+                 borderType=cv2.BORDER_REPLICATE)
+        cv2.resize(self._blurred, (cols, rows), dst=self._soft, interpolation=cv2.INTER_LINEAR)
+        cv2.min(self.alpha, self._soft, dst=self.alpha)
+
+    def composite(self, key_color):
+        """Write the colour-keyed RGB into the frame in one pass: keyed pixels become key_color,
+        feathered edge pixels are spill suppressed and opaque pixels are left alone."""
+        key = tuple(int(c) for c in key_color[:3])
+        high = spill_channels(key) if self.spill and self.feather > 0 else None
+        kernels = numba_kernels() if high is not None and self.use_numba else None
+        if kernels is not None and cv2_compatible(self.rgb):
+            kernels.composite_alpha(self.rgb, self.alpha, key[0], key[1], key[2], self.cutoff, *(high or (0, 0, 0)))
+            return
+        if self._key_image is None or tuple(self._key_image[0, 0]) != key:
+            self._key_image = np.empty(self.rgb.shape, dtype=np.uint8)
+            self._key_image[:] = key
+        keyed = cv2.compare(self.alpha, self.cutoff, cv2.CMP_LE)
+        if not cv2_compatible(self.rgb):
+            np.copyto(self.rgb, self._key_image, where=keyed.astype(np.bool_)[..., None])
+        else:
+            cv2.copyTo(self._key_image, keyed, self.rgb)
+        # A masked copy beats the per-pixel kernel when there is no spill to suppress
+        if high is None or not self.rgb.flags.c_contiguous:
+            return
+        # Without numba: the feathered band is a thin edge, so gather just those pixels
+        band = np.flatnonzero(cv2.inRange(self.alpha, self.cutoff + 1, 254))
+        if not band.size:
+            return
+        pixels = self.rgb.reshape(-1, 3)
+        values = pixels[band].astype(np.int32)
+        flags = np.array(high, dtype=bool)
+        strong = values[:, flags].min(axis=1)
+        low = values[:, ~flags].max(axis=1)
+        weight = 255 - self.alpha.reshape(-1)[band].astype(np.int32)
+        excess = (np.maximum(strong - low, 0) * weight + 127) // 255
+        values[:, flags] -= excess[:, None]
+        pixels[band] = values
+
+    def apply(self, rgb, keyer):
+        """Key rgb in place with keyer (set_key already called), feathering the edges if enabled."""
+        self.set_mask(rgb, keyer.mask(rgb))
+        self.feather_edges()
+        self.composite(keyer.key_color)
+
+    def apply_keyed(self, rgb, key_color):
+        """Feather and composite a frame whose keyed pixels already hold exactly key_color."""
+        self.set_key_color(rgb, key_color)
+        self.feather_edges()
+        self.composite(key_color)
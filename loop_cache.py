@@ -0,0 +1,159 @@
+"""Keep fully keyed output frames of short looping clips in RAM.
+
+The first pass through a clip is decoded and keyed as usual, with every
+output frame copied into the cache. When the frame count is known up front
+the whole loop gets one block of storage, so the first pass allocates once
+rather than per frame. Once all frames of the loop are held,
+later loops are served from memory with no decoding, seeking or keying.
+Entries are tied to the settings the frames were keyed with, so a colour,
+tolerance or window size change makes them stale.
+"""
+import bisect
+import collections
+
+import numpy as np
+
+
+class CachedLoop:
+    """Keyed output frames of one clip for one set of key settings."""
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.frames = {}  # Frame index -> (time within the clip, keyed RGB frame)
+        self.frame_count = None  # Known once the decoder has wrapped the clip
+        self.duration = None
+        self.over_budget = False  # The whole loop does not fit; stop trying for this key
+        self.nbytes = 0
+        self.storage = None  # (frames, rows, cols, 3) block the frames are copied into, if preallocated
+        self._times = None
+        self._images = None
+
+    @property
+    def complete(self):
+        return self.frame_count is not None and len(self.frames) >= self.frame_count
+
+    def set_length(self, frame_count, duration):
+        """Record the loop length; frames past the end (if any) are dropped."""
+        if self.frame_count is not None:
+            return
+        self.frame_count = frame_count
+        self.duration = duration
+        for index in [i for i in self.frames if i >= frame_count]:
+            frame = self.frames.pop(index)[1]
+            if not self._in_storage(index):
+                self.nbytes -= frame.nbytes
+
+    def allocate(self, frame_count, frame):
+        """Reserve storage for frame_count frames shaped like frame."""
+        self.storage = np.empty((frame_count,) + frame.shape, dtype=frame.dtype)
+        self.nbytes += self.storage.nbytes
+
+    def _in_storage(self, index):
+        return self.storage is not None and index < len(self.storage)
+
+    def slot(self, index):
+        """The preallocated buffer for frame index, or None past the end of the storage."""
+        return self.storage[index] if self._in_storage(index) else None
+
+    def clear(self):
+        self.frames.clear()
+        self.storage = None
+        self.nbytes = 0
+
+    def _index(self):
+        if self._times is None:
+            ordered = [self.frames[i] for i in range(self.frame_count)]
+            self._times = [clip_time for clip_time, _ in ordered]
+            self._images = [image for _, image in ordered]
+
+    def frame_at(self, frame_time):
+        """(index, frame) due at presentation time frame_time, which may span many loops."""
+        self._index()
+        loop_time = frame_time % self.duration
+        index = max(0, bisect.bisect_right(self._times, loop_time) - 1)
+        return index, self._images[index]
+
+    def time_until_next(self, frame_time):
+        """Seconds from frame_time until the following cached frame is due."""
+        self._index()
+        loop_time = frame_time % self.duration
+        index = bisect.bisect_right(self._times, loop_time)
+        next_time = self._times[index] if index < len(self._times) else self.duration
+        return next_time - loop_time
+
+
+class LoopCache:
+    """Least recently used set of CachedLoops sharing one byte budget."""
+
+    def __init__(self, budget=512 * 1024 * 1024):
+        self.budget = budget
+        self.loops = collections.OrderedDict()  # Clip path -> CachedLoop
+        self.hits = 0  # Frames served from the cache
+
+    @property
+    def nbytes(self):
+        return sum(loop.nbytes for loop in self.loops.values())
+
+    def get(self, path, key):
+        """The CachedLoop for path if it was keyed with key; stale entries are dropped."""
+        loop = self.loops.get(path)
+        if loop is None:
+            return None
+        if loop.key != key:
+            del self.loops[path]
+            return None
+        self.loops.move_to_end(path)
+        return loop
+
+    def store(self, path, key, index, clip_time, frame, frame_count_hint=None):
+        """Copy one keyed output frame into the loop for path and return its CachedLoop."""
+        loop = self.get(path, key)
+        if loop is None:
+            loop = self.loops[path] = CachedLoop(path, key)
+            if frame_count_hint and frame_count_hint * frame.nbytes > self.budget:
+                loop.over_budget = True  # Would never fit; don't churn the other clips out
+        if loop.over_budget or index in loop.frames or (loop.frame_count and index >= loop.frame_count):
+            return loop
+        if loop.storage is None and not loop.frames and frame_count_hint:
+            if not self._make_room(path, frame_count_hint * frame.nbytes):
+                loop.over_budget = True
+                return loop
+            loop.allocate(frame_count_hint, frame)
+        slot = loop.slot(index)
+        if slot is None:
+            # No (or too small a) frame count estimate: one buffer per frame
+            if not self._make_room(path, frame.nbytes):
+                loop.over_budget = True
+                loop.clear()
+                return loop
+            slot = np.empty_like(frame)
+            loop.nbytes += frame.nbytes
+        np.copyto(slot, frame)
+        loop.frames[index] = (clip_time, slot)
+        return loop
+
+    def _make_room(self, path, nbytes):
+        """Evict other clips, least recently used first, until nbytes more fit."""
+        total = self.nbytes
+        for other in list(self.loops):
+            if total + nbytes <= self.budget:
+                break
+            if other != path:
+                total -= self.loops.pop(other).nbytes
+        return total + nbytes <= self.budget
+
+    def invalidate(self, path=None):
+        """Drop the loop for path, or every loop."""
+        if path is None:
+            self.loops.clear()
+        else:
+            self.loops.pop(path, None)
+
+    def stats(self):
+        return {
+            "clips": len(self.loops),
+            "complete": sum(loop.complete for loop in self.loops.values()),
+            "megabytes": self.nbytes / (1024 * 1024),
+            "hits": self.hits,
+        }
@@ -0,0 +1,345 @@
+"""Run several overlays from one process.
+
+Every overlay keeps its own playlist, window, scale and key settings, but all
+of them share one bounded FramePool, on which decoding and keying run as
+tasks instead of a thread per clip, and one vlc.Instance for audio. The main
+loop sleeps until the earliest presentation deadline, keys every overlay that
+is due on the pool, then presents them.
+
+    python multi_overlay.py clip1.webm "clip2.mp4,clip3.mp4" [--scale 0.5] [--workers 4]
+    python multi_overlay.py --config overlays.json
+
+Each argument is one overlay's playlist (comma-separated clips), using the
+settings given on the command line. A config file gives each overlay its own
+settings; anything it leaves out comes from the command line:
+
+    [{"clips": ["dancer.webm"], "scale": 0.5, "color": [0, 255, 0], "tolerance": 40},
+     {"clips": ["cat.mp4", "dog.mp4"], "metric": "ycbcr", "position": [800, 100]}]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+from pygame._sdl2.video import Renderer, Texture, Window
+
+from audio_engine import AudioEngine
+from chroma_key import KEY_METRICS, create_keyer
+from decode_worker import DecodeWorker
+from frame_pool import FramePool
+from frame_render import decode_size, render_frame
+from frame_scheduler import PresentationClock
+from window_backend import apply_color_key, cursor_position, find_window
+
+# Config file names of the per-overlay settings -> OverlayInstance arguments
+OVERLAY_SETTINGS = {
+    "scale": "scale_factor",
+    "color": "transparency_color",
+    "tolerance": "color_tolerance",
+    "metric": "key_metric",
+    "backend": "chroma_backend",
+    "policy": "scale_policy",
+    "position": "position",
+}
+
+
+def load_overlay_config(path):
+    """Per-overlay playlists and settings from a JSON list, as dicts of OverlayInstance arguments."""
+    with open(path) as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("The overlay config must be a list with one entry per overlay")
+    overlays = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("Every overlay in the config must be an object")
+        unknown = set(entry) - set(OVERLAY_SETTINGS) - {"clips"}
+        if unknown:
+            raise ValueError(f"Unknown overlay settings: {', '.join(sorted(unknown))}")
+        clips = entry.get("clips")
+        if not clips:
+            raise ValueError("Every overlay in the config needs clips")
+        overlay = {"video_paths": clips.split(",") if isinstance(clips, str) else list(clips)}
+        for name, value in entry.items():
+            if name == "clips":
+                continue
+            if name in ("color", "position"):
+                value = tuple(int(c) for c in value)
+            elif name == "metric" and value not in KEY_METRICS:
+                raise ValueError(f"Unknown key metric: {value}")
+            overlay[OVERLAY_SETTINGS[name]] = value
+        overlays.append(overlay)
+    return overlays
+
+
+class OverlayInstance:
+    """One overlay: a playlist playing in its own borderless window, or headless without one."""
+
+    def __init__(self, video_paths, pool, vlc_instance=None, title="Desktop Video Overlay", position=None,
+                 windowed=True, scale_factor=1.0, transparency_color=(255, 0, 255), color_tolerance=30,
+                 key_metric="rgb", chroma_backend="auto", scale_policy="scale_then_key", queue_size=4):
+        self.video_paths = list(video_paths)
+        self.current_video_index = 0
+        self.pool = pool  # Shared with every other overlay
+        self.vlc_instance = vlc_instance  # Shared; None plays without audio
+        self.title = title
+        self.position = position
+        self.windowed = windowed
+        self.scale_factor = scale_factor
+        self.transparency_color = transparency_color
+        self.color_tolerance = color_tolerance
+        self.key_metric = key_metric
+        self.scale_policy = scale_policy
+        self.queue_size = queue_size
+        self.keyer = create_keyer(chroma_backend, key_metric)  # Only used by this overlay's render task
+        self.clock = PresentationClock()
+        self.video = None
+        self.audio = AudioEngine(vlc_instance) if vlc_instance is not None else None  # Player on its own thread
+        self.is_playing = True
+        self.width = self.height = 0
+        self.frame_buffer = None
+        self.frame_surface = None
+        self.scratch = None  # Source-size buffer for render_frame
+        self.window = None
+        self.renderer = None
+        self.texture = None
+        self.decode_future = None  # Pending fill() of the decode ring
+        self.load_video()
+
+    def load_video(self):
+        """Open the current clip, size the window to it and start its audio."""
+        if self.video:
+            self.video.release()
+        path = self.video_paths[self.current_video_index]
+        # No thread of its own: the shared pool pumps it with fill()
+        self.video = DecodeWorker(path, self.queue_size, threaded=False)
+        self.decode_future = None
+        self.clock.reset()
+        self.scratch = None
+        width = max(50, int(self.video.width * self.scale_factor))
+        height = max(50, int(self.video.height * self.scale_factor))
+        self.video.set_output_size(decode_size(self.scale_policy, (width, height),
+                                               (self.video.width, self.video.height)))
+        if (width, height) != (self.width, self.height):
+            self.width, self.height = width, height
+            self.frame_buffer = np.empty((height, width, 3), dtype=np.uint8)
+            self.frame_buffer[:] = self.transparency_color
+            self.frame_surface = pygame.image.frombuffer(self.frame_buffer.data, (width, height), "RGB")
+            if self.windowed:
+                self.open_window()
+        if self.audio:
+            self.audio.play(path, paused=not self.is_playing)
+        print(f"{self.title}: {os.path.basename(path)} ({self.width}x{self.height})")
+
+    def open_window(self):
+        if self.window is None:
+            self.window = Window(self.title, size=(self.width, self.height), borderless=True)
+            if self.position:
+                self.window.position = self.position
+            self.renderer = Renderer(self.window)
+            apply_color_key(find_window(self.title), self.transparency_color)
+        else:
+            self.window.size = (self.width, self.height)
+        self.texture = Texture(self.renderer, (self.width, self.height), streaming=True)
+
+    def next_video(self, step=1):
+        self.current_video_index = (self.current_video_index + step) % len(self.video_paths)
+        self.load_video()
+
+    def toggle_pause(self):
+        self.is_playing = not self.is_playing
+        if self.is_playing:
+            self.clock.resume()
+        else:
+            self.clock.pause()
+        if self.audio:
+            if self.is_playing:
+                self.audio.resume(start_time=self.clock.clip_time(self.video.loop_duration if self.video else None))
+            else:
+                self.audio.pause()
+
+    def schedule_decode(self):
+        """Queue a decode task on the pool when the ring has room and none is pending."""
+        if not self.video.running or not self.video.free_slots:
+            return
+        if self.decode_future is None or self.decode_future.done():
+            self.decode_future = self.pool.submit(self.video.fill)
+
+    def time_until_due(self):
+        """Seconds until the next queued frame is due, or None when paused or nothing is queued."""
+        frame_time = self.video.next_frame_time()
+        if frame_time is None or not self.is_playing:
+            return None
+        if not self.clock.started:
+            return 0.0
+        return self.clock.time_until(frame_time)
+
+    def render(self):
+        """Key the newest due frame into the frame buffer; True if there is a new frame to present."""
+        if not self.clock.started:
+            frame_time = self.video.next_frame_time()
+            if frame_time is None:
+                return False
+            self.clock.start(frame_time)
+        self.clock.sync_audio(self.audio.synced_player() if self.audio else None, self.video.loop_duration)
+        ret, frame_rgb = self.video.read(until=self.clock.time())
+        if not ret:
+            return False
+        self.clock.record_presentation(self.video.current_time)
+        self.scratch = render_frame(frame_rgb, self.frame_buffer, self.keyer, self.transparency_color,
+                                    self.color_tolerance, self.scale_policy, self.scratch)
+        return True
+
+    def present(self):
+        """Show the frame buffer in the window (main thread only)."""
+        if self.texture is None:
+            return
+        self.texture.update(self.frame_surface)
+        self.renderer.clear()
+        self.texture.draw()
+        self.renderer.present()
+
+    def owns(self, event):
+        window = getattr(event, "window", None)
+        return window is not None and self.window is not None and window.id == self.window.id
+
+    def release(self):
+        if self.video:
+            self.video.release()
+        if self.audio:
+            self.audio.release()
+        if self.window is not None:
+            self.window.destroy()
+
+
+class MultiOverlay:
+    """N overlays sharing one worker pool and one VLC instance, scheduled by presentation deadline."""
+
+    def __init__(self, playlists, workers=None, windowed=True, audio=True, **settings):
+        """playlists holds one entry per overlay: a list of clips, or a dict of OverlayInstance
+        arguments (video_paths plus that overlay's settings, e.g. from load_overlay_config).
+        settings apply to every overlay that doesn't set its own."""
+        pygame.init()
+        self.pool = FramePool(workers)
+        self.vlc_instance = None
+        if audio:
+            import vlc  # Only with audio, so muted runs work without python-vlc
+            self.vlc_instance = vlc.Instance('--no-video')
+        self.overlays = []
+        for index, playlist in enumerate(playlists):
+            options = dict(settings, title=f"Desktop Video Overlay {index + 1}",
+                           position=(60 + 40 * index, 60 + 40 * index), windowed=windowed)
+            if isinstance(playlist, dict):
+                options.update(playlist)
+            else:
+                options["video_paths"] = playlist
+            self.overlays.append(OverlayInstance(pool=self.pool, vlc_instance=self.vlc_instance, **options))
+        self.running = True
+        self.dragging = None  # (overlay, offset within its window)
+        self.frames_presented = 0
+
+    def step(self):
+        """Decode, key and present every overlay that is due, then sleep until the next deadline."""
+        for overlay in self.overlays:
+            overlay.schedule_decode()
+        due = []
+        for overlay in self.overlays:
+            wait = overlay.time_until_due()
+            if wait is not None and wait <= 0:
+                due.append(overlay)
+        renders = [(overlay, self.pool.submit(overlay.render)) for overlay in due]
+        for overlay, render in renders:
+            if render.result():
+                overlay.present()
+                self.frames_presented += 1
+        self.handle_events()
+        self.wait_for_next_deadline()
+
+    def wait_for_next_deadline(self):
+        waits = [wait for wait in (overlay.time_until_due() for overlay in self.overlays) if wait is not None]
+        if waits:
+            delay = min(min(waits), 0.1)
+        elif any(overlay.is_playing for overlay in self.overlays):
+            delay = 0.005  # Decoders are behind; check again soon
+        else:
+            delay = 1 / 60  # All paused: keep input responsive
+        if delay > 0:
+            time.sleep(delay)
+
+    def overlay_for(self, event):
+        for overlay in self.overlays:
+            if overlay.owns(event):
+                return overlay
+        return self.overlays[0]
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                elif event.key == pygame.K_SPACE:
+                    self.overlay_for(event).toggle_pause()
+                elif event.key == pygame.K_RIGHT:
+                    self.overlay_for(event).next_video(1)
+                elif event.key == pygame.K_LEFT:
+                    self.overlay_for(event).next_video(-1)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.dragging = (self.overlay_for(event), event.pos)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.dragging = None
+            elif event.type == pygame.MOUSEMOTION and self.dragging:
+                overlay, offset = self.dragging
+                if overlay.window is not None:
+                    x, y = cursor_position()
+                    overlay.window.position = (x - offset[0], y - offset[1])
+
+    def run(self):
+        try:
+            while self.running:
+                self.step()
+        finally:
+            self.release()
+
+    def release(self):
+        for overlay in self.overlays:
+            overlay.release()
+        if self.vlc_instance is not None:
+            self.vlc_instance.release()  # Each engine joins its thread, so no player still uses it
+        self.pool.release()
+        pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play several desktop video overlays from one process.")
+    parser.add_argument("playlists", nargs="*", help="one argument per overlay: comma-separated clip paths")
+    parser.add_argument("--config", help="JSON file with each overlay's clips and settings")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale factor for every overlay")
+    parser.add_argument("--color", default="255,0,255", help="key colour as R,G,B")
+    parser.add_argument("--tolerance", type=int, default=30)
+    parser.add_argument("--metric", default="rgb", choices=list(KEY_METRICS))
+    parser.add_argument("--workers", type=int, help="shared worker threads (default: CPU count, capped at 4)")
+    parser.add_argument("--mute", action="store_true", help="play without audio")
+    args = parser.parse_args()
+    color = tuple(int(c) for c in args.color.split(","))
+    playlists = [paths.split(",") for paths in args.playlists]
+    if args.config:
+        try:
+            playlists += load_overlay_config(args.config)
+        except (OSError, ValueError) as e:
+            parser.error(f"Error reading {args.config}: {e}")
+    if not playlists:
+        parser.error("give at least one playlist or a --config file")
+    print("Controls: Esc exits; Space pauses, Left/Right switch clips in the focused overlay; drag to move")
+    MultiOverlay(playlists, workers=args.workers, audio=not args.mute,
+                 scale_factor=args.scale, transparency_color=color, color_tolerance=args.tolerance,
+                 key_metric=args.metric).run()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
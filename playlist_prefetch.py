@@ -0,0 +1,140 @@
+import collections
+import os
+import queue
+import threading
+
+from decode_worker import DecodeWorker
+
+
+class PrefetchedClip:
+    """A playlist entry opened, pre-decoded and analysed ahead of time."""
+
+    def __init__(self, path, worker, chroma=None):
+        self.path = path
+        self.worker = worker  # DecodeWorker with its ring already filled
+        self.chroma = chroma  # Auto-detected (color, tolerance), if requested
+
+    @property
+    def nbytes(self):
+        return self.worker.nbytes
+
+    def release(self):
+        self.worker.release()
+
+
+class PlaylistPrefetcher:
+    """Keep the playlist neighbours of the current clip warm on a background thread.
+
+    At most max_warm clips are kept, and their frame rings together stay
+    under memory_budget bytes; the least recently used clip is evicted first.
+    """
+
+    def __init__(self, queue_size=4, max_warm=2, memory_budget=256 * 1024 * 1024, detect_chroma=None,
+                 pool=None):
+        self.queue_size = queue_size
+        self.max_warm = max_warm
+        self.memory_budget = memory_budget
+        self.detect_chroma = detect_chroma  # Callable(video_path) -> (color, tolerance) or None
+        self.pool = pool  # FramePool handed to the decode workers
+        self.clips = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.hits = 0
+        self.misses = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def prefetch(self, paths, index, auto_chroma=False):
+        """Warm the clips either side of paths[index] in the background."""
+        if len(paths) < 2:
+            return
+        wanted = []
+        for offset in (1, -1):
+            path = paths[(index + offset) % len(paths)]
+            if path != paths[index] and path not in wanted:
+                wanted.append(path)
+        self.requests.put((wanted, auto_chroma))
+
+    def take(self, path):
+        """Hand over the warm clip for path, or None if it is not ready."""
+        with self.lock:
+            clip = self.clips.pop(path, None)
+        if clip is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return clip
+
+    @property
+    def nbytes(self):
+        with self.lock:
+            return sum(clip.nbytes for clip in self.clips.values())
+
+    def stats(self):
+        with self.lock:
+            warm = len(self.clips)
+        return {"warm": warm, "bytes": self.nbytes, "hits": self.hits, "misses": self.misses}
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            # Only the newest request matters when the user skips through quickly
+            while request is not None and not self.requests.empty():
+                request = self.requests.get_nowait()
+            if request is None:
+                return
+            wanted, auto_chroma = request
+            for path in wanted:
+                with self.lock:
+                    clip = self.clips.get(path)
+                    if clip is not None:
+                        self.clips.move_to_end(path)
+                if clip is None:
+                    clip = self._warm(path, auto_chroma)
+                    if clip is not None:
+                        self._store(clip)
+                elif auto_chroma and clip.chroma is None:
+                    self._detect(clip)
+
+    def _warm(self, path, auto_chroma):
+        """Open, pre-decode and analyse one clip."""
+        try:
+            # No profiler: warm-up decoding would mix into playback timings; load_video sets it on take
+            worker = DecodeWorker(path, self.queue_size, pool=self.pool)
+        except Exception as e:
+            print(f"Prefetch failed for {os.path.basename(path)}: {e}")
+            return None
+        if worker.nbytes > self.memory_budget:
+            worker.release()
+            return None
+        clip = PrefetchedClip(path, worker)
+        if auto_chroma:
+            self._detect(clip)
+        return clip
+
+    def _detect(self, clip):
+        if self.detect_chroma is None:
+            return
+        try:
+            clip.chroma = self.detect_chroma(clip.path)
+        except Exception as e:
+            print(f"Prefetch chroma detection failed for {os.path.basename(clip.path)}: {e}")
+
+    def _store(self, clip):
+        evicted = []
+        with self.lock:
+            self.clips[clip.path] = clip
+            while len(self.clips) > self.max_warm or (
+                    len(self.clips) > 1 and sum(c.nbytes for c in self.clips.values()) > self.memory_budget):
+                evicted.append(self.clips.popitem(last=False)[1])
+        for old in evicted:
+            old.release()
+
+    def release(self):
+        """Stop the prefetch thread and release every warm clip."""
+        self.requests.put(None)
+        with self.lock:
+            clips = list(self.clips.values())
+            self.clips.clear()
+        for clip in clips:
+            clip.release()
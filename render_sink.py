@@ -0,0 +1,227 @@
+"""Run playlists through decode -> scale -> key as fast as possible, with no window.
+
+The keyed frames go to a sink instead of the layered window, and frames/sec
+is reported on stderr. Runs on any OS without a display.
+
+    python render_sink.py clip.webm [more clips] --sink rgba > frames.raw   (raw RGBA on stdout)
+    python render_sink.py clip.webm --sink png:out/frame_%05d.png
+    python render_sink.py clip.webm --sink npy:out/frame_%05d.npy
+    python render_sink.py clip.webm --sink video:keyed.mp4
+    python render_sink.py clip.webm --sink null                           (throughput only)
+    python render_sink.py clip.webm --sink png:out/frame_%05d.png --feather 4
+
+RGBA, PNG and NPY frames carry the keyed frame's alpha plane: 0 where the
+layered window would be see-through and 255 elsewhere, with soft values
+along the edges when --feather is given. Video files hold the keyed RGB
+frames, as codecs have no alpha.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from chroma_key import KEY_METRICS, create_keyer
+from decode_worker import DecodeWorker
+from frame_pool import FramePool, StripedKeyer
+from frame_render import decode_size, render_frame
+from keyed_frame import KeyedFrame
+
+
+class RawSink:
+    """Packed RGBA frames written back to back to a binary stream (stdout by default)."""
+    needs_alpha = True
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout.buffer
+        self.rgba = None
+
+    def write(self, rgb, alpha):
+        if self.rgba is None or self.rgba.shape[:2] != rgb.shape[:2]:
+            self.rgba = np.empty(rgb.shape[:2] + (4,), dtype=np.uint8)
+        cv2.merge((rgb[..., 0], rgb[..., 1], rgb[..., 2], alpha), dst=self.rgba)
+        self.stream.write(self.rgba.data)
+
+    def close(self):
+        self.stream.flush()
+
+
+class ImageSequenceSink:
+    """One file per frame from a %d pattern: .png (RGBA) or .npy (RGBA array)."""
+    needs_alpha = True
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.index = 0
+        self.npy = pattern.lower().endswith(".npy")
+        self.image = None
+        directory = os.path.dirname(pattern)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, rgb, alpha):
+        if self.image is None or self.image.shape[:2] != rgb.shape[:2]:
+            self.image = np.empty(rgb.shape[:2] + (4,), dtype=np.uint8)
+        path = self.pattern % self.index
+        self.index += 1
+        if self.npy:
+            cv2.merge((rgb[..., 0], rgb[..., 1], rgb[..., 2], alpha), dst=self.image)
+            np.save(path, self.image)
+        else:
+            cv2.merge((rgb[..., 2], rgb[..., 1], rgb[..., 0], alpha), dst=self.image)  # imwrite takes BGRA
+            if not cv2.imwrite(path, self.image):
+                raise Exception(f"Could not write {path}")
+
+    def close(self):
+        pass
+
+
+class VideoSink:
+    """Keyed RGB frames encoded with cv2.VideoWriter; opened on the first frame at its size."""
+    needs_alpha = False
+
+    def __init__(self, path, fps=30.0):
+        self.path = path
+        self.fps = fps
+        self.writer = None
+        self.size = None
+        self.bgr = None
+
+    def write(self, rgb, alpha):
+        size = (rgb.shape[1], rgb.shape[0])
+        if self.writer is None:
+            fourcc = "MJPG" if self.path.lower().endswith(".avi") else "mp4v"
+            self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*fourcc), self.fps, size)
+            if not self.writer.isOpened():
+                raise Exception(f"Could not create video file {self.path}")
+            self.size = size
+            self.bgr = np.empty_like(rgb)
+        if size != self.size:
+            self.bgr = cv2.resize(rgb, self.size, interpolation=cv2.INTER_NEAREST)  # One size per file
+            cv2.cvtColor(self.bgr, cv2.COLOR_RGB2BGR, dst=self.bgr)
+        else:
+            cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=self.bgr)
+        self.writer.write(self.bgr)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+
+class NullSink:
+    """Discards frames, for measuring the pipeline alone."""
+    needs_alpha = False
+
+    def write(self, rgb, alpha):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_sink(spec, fps=30.0):
+    """Sink for a --sink value: rgba, null, png:PATTERN, npy:PATTERN or video:PATH."""
+    kind, _, target = spec.partition(":")
+    if kind == "rgba":
+        return RawSink()
+    if kind == "null":
+        return NullSink()
+    if kind in ("png", "npy"):
+        if not target or "%" not in target:
+            raise ValueError(f"{kind} sink needs a %d file pattern, e.g. {kind}:out/frame_%05d.{kind}")
+        return ImageSequenceSink(target)
+    if kind == "video":
+        if not target:
+            raise ValueError("video sink needs a file name, e.g. video:keyed.mp4")
+        return VideoSink(target, fps)
+    raise ValueError(f"Unknown sink: {spec}")
+
+
+def render_clip(path, sink, keyer, pool, key_color=(255, 0, 255), tolerance=30, scale=1.0,
+                scale_policy="scale_then_key", queue_size=4, feather=0):
+    """Decode, scale and key every frame of path once, in order, into sink; returns the frame count.
+
+    Decoding runs as tasks on pool, overlapping the keying of earlier frames.
+    Sinks that want alpha, and feathering, key through a KeyedFrame.
+    """
+    # No conversion stripes: the decode task already runs on the pool
+    video = DecodeWorker(path, queue_size, threaded=False, loop=False)
+    try:
+        width, height = max(1, int(video.width * scale)), max(1, int(video.height * scale))
+        video.set_output_size(decode_size(scale_policy, (width, height), (video.width, video.height)))
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        keyed_frame = KeyedFrame(feather) if feather or sink.needs_alpha else None
+        scratch = None
+        decode = None
+        frames = 0
+        while True:
+            if decode is None or decode.done():
+                if decode is not None:
+                    decode.result()  # Surface decode errors
+                decode = pool.submit(video.fill) if video.free_slots and not video.ended else None
+            if video.peek_frame(timeout=5.0) is None:
+                if video.ended or not video.running:
+                    break
+                raise Exception("Timed out waiting for the decoder")
+            ret, frame_rgb = video.read()
+            scratch = render_frame(frame_rgb, out, keyer, key_color, tolerance, scale_policy, scratch,
+                                   keyed_frame=keyed_frame)
+            sink.write(out, keyed_frame.alpha if keyed_frame is not None else None)
+            frames += 1
+        if decode is not None:
+            decode.result()
+        return frames
+    finally:
+        video.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Key video clips as fast as possible into a frame sink.")
+    parser.add_argument("clips", nargs="+", help="clips to render in order")
+    parser.add_argument("--sink", default="null", help="rgba, null, png:PATTERN, npy:PATTERN or video:PATH")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--color", default="255,0,255", help="key colour as R,G,B")
+    parser.add_argument("--tolerance", type=int, default=30)
+    parser.add_argument("--feather", type=int, default=0, help="feather keyed edges by this many pixels")
+    parser.add_argument("--metric", default="rgb", choices=list(KEY_METRICS))
+    parser.add_argument("--backend", default="auto", help="chroma key backend")
+    parser.add_argument("--policy", default="scale_then_key", choices=("scale_then_key", "key_then_scale"))
+    parser.add_argument("--workers", type=int, help="worker threads (default: CPU count, capped at 4)")
+    args = parser.parse_args()
+    color = tuple(int(c) for c in args.color.split(","))
+
+    pool = FramePool(args.workers)
+    if pool.workers > 1:
+        keyer = StripedKeyer(args.backend, pool, args.metric)
+    else:
+        keyer = create_keyer(args.backend, args.metric)
+    probe = cv2.VideoCapture(args.clips[0])
+    fps = probe.get(cv2.CAP_PROP_FPS) or 30.0
+    probe.release()
+    sink = open_sink(args.sink, fps)
+    total_frames, total_start = 0, time.perf_counter()
+    try:
+        for path in args.clips:
+            start = time.perf_counter()
+            try:
+                frames = render_clip(path, sink, keyer, pool, color, args.tolerance, args.scale, args.policy,
+                                     feather=args.feather)
+            except Exception as e:
+                print(f"Error rendering {os.path.basename(path)}: {e}", file=sys.stderr)
+                continue
+            elapsed = time.perf_counter() - start
+            total_frames += frames
+            print(f"{os.path.basename(path)}: {frames} frames in {elapsed:.2f}s "
+                  f"({frames / elapsed if elapsed else 0:.1f} fps)", file=sys.stderr)
+    finally:
+        sink.close()
+        pool.release()
+    elapsed = time.perf_counter() - total_start
+    print(f"Total: {total_frames} frames in {elapsed:.2f}s ({total_frames / elapsed if elapsed else 0:.1f} fps, "
+          f"keyer {keyer.name}, {pool.workers} worker{'s' if pool.workers > 1 else ''})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
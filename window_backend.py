@@ -0,0 +1,132 @@
+"""Window backends: everything the overlay needs from the window system.
+
+LayeredWindow is the real overlay on Windows: a borderless pygame window,
+layered and always on top, with the key colour see-through. HeadlessWindow
+draws into an off-screen surface and shows nothing, so the same pipeline
+runs on any OS with no display (benchmarks, batch rendering).
+"""
+import os
+
+import pygame
+
+try:
+    import win32api
+    import win32con
+    import win32gui
+except ImportError:  # Not on Windows: only HeadlessWindow is usable
+    win32api = win32con = win32gui = None
+
+
+def apply_color_key(hwnd, color):
+    """Make a window layered and always on top, with pixels of exactly color see-through."""
+    win32gui.SetWindowLong(
+        hwnd,
+        win32con.GWL_EXSTYLE,
+        win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE) |
+        win32con.WS_EX_LAYERED | win32con.WS_EX_TOPMOST
+    )
+    win32gui.SetLayeredWindowAttributes(
+        hwnd,
+        win32api.RGB(*color),
+        0,
+        win32con.LWA_COLORKEY
+    )
+
+
+def find_window(title):
+    """Handle of the top-level window called title."""
+    return win32gui.FindWindow(None, title)
+
+
+def cursor_position():
+    """Mouse position in screen coordinates."""
+    return win32gui.GetCursorPos()
+
+
+class WindowBackend:
+    """Where finished frames are shown.
+
+    open() returns the surface the overlay draws into and is called again on
+    every size change; present() shows what was drawn, either entirely or
+    just the given dirty rects.
+    """
+    name = "base"
+
+    def open(self, size, title="Desktop Video Overlay"):
+        raise NotImplementedError
+
+    def set_color_key(self, color):
+        """Make pixels of exactly color see-through."""
+
+    def move_to_cursor(self, offset):
+        """Move the window so the point offset within it sits under the mouse (dragging)."""
+
+    def present(self, rects=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LayeredWindow(WindowBackend):
+    """Borderless pygame display window on Windows, colour-keyed with a layered window style."""
+    name = "win32"
+
+    def __init__(self):
+        if win32gui is None:
+            raise Exception("The layered window backend needs Windows (pywin32)")
+        self.hwnd = None
+
+    def open(self, size, title="Desktop Video Overlay"):
+        screen = pygame.display.set_mode(size, pygame.NOFRAME | pygame.RESIZABLE)
+        pygame.display.set_caption(title)
+        self.hwnd = pygame.display.get_wm_info()["window"]
+        return screen
+
+    def set_color_key(self, color):
+        apply_color_key(self.hwnd, color)
+
+    def move_to_cursor(self, offset):
+        x, y = cursor_position()
+        win32gui.SetWindowPos(
+            self.hwnd,
+            win32con.HWND_TOPMOST,
+            x - offset[0],
+            y - offset[1],
+            0, 0,
+            win32con.SWP_NOSIZE
+        )
+
+    def present(self, rects=None):
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+
+
+class HeadlessWindow(WindowBackend):
+    """Off-screen surface on SDL's dummy display; frames are counted, not shown.
+
+    Create it before pygame is initialised so the dummy driver is picked up.
+    """
+    name = "headless"
+
+    def __init__(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.surface = None
+        self.color_key = None
+        self.frames_presented = 0
+
+    def open(self, size, title="Desktop Video Overlay"):
+        if not pygame.display.get_init():
+            pygame.display.init()
+        if pygame.display.get_surface() is None:
+            pygame.display.set_mode((1, 1))  # Events and fonts need a display, however small
+        self.surface = pygame.Surface(size)
+        return self.surface
+
+    def set_color_key(self, color):
+        self.color_key = tuple(color)
+
+    def present(self, rects=None):
+        self.frames_presented += 1